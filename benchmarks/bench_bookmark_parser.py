@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_analyzer
+
+#---- Configs
+BOOKMARK_COUNT = 50000
+FOLDER_SIZE = 250   # Bookmarks per synthetic folder
+
+def main():
+    """
+    Compares the streaming Netscape parser against the BeautifulSoup parser
+    on a synthetic bookmarks export: wall time, peak traced memory and output.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bookmarks.html')
+        write_synthetic_export(path, BOOKMARK_COUNT)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"Synthetic export: {BOOKMARK_COUNT} bookmarks, {size_mb:.1f} MB")
+        print("-" * 50)
+
+        soup_result, soup_time, soup_peak = measure(
+            lambda: bookmark_analyzer.parse_bookmarks_soup(path))
+        stream_result, stream_time, stream_peak = measure(
+            lambda: list(bookmark_analyzer.iter_bookmarks(path)))
+
+    soup_keys = [(bm['name'], bm['url'], bm['add_date']) for bm in soup_result]
+    stream_keys = [(bm['name'], bm['url'], bm['add_date']) for bm in stream_result]
+
+    print(f"BeautifulSoup: {soup_time:6.2f}s  peak {soup_peak / 1e6:8.1f} MB  ({len(soup_result)} bookmarks)")
+    print(f"Streaming:     {stream_time:6.2f}s  peak {stream_peak / 1e6:8.1f} MB  ({len(stream_result)} bookmarks)")
+    print(f"Speedup: {soup_time / stream_time:.1f}x, memory: {soup_peak / stream_peak:.0f}x less")
+    print(f"Outputs match: {soup_keys == stream_keys}")
+
+
+def measure(func):
+    """Times func on its own, then reruns it under tracemalloc for the memory peak."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def write_synthetic_export(path, count):
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n')
+        out.write('<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n')
+        out.write('<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n')
+        for i in range(count):
+            if i % FOLDER_SIZE == 0:
+                if i:
+                    out.write('    </DL><p>\n')
+                out.write(f'    <DT><H3 ADD_DATE="1700000000">Folder {i // FOLDER_SIZE}</H3>\n    <DL><p>\n')
+            out.write(f'        <DT><A HREF="https://example{i % 997}.com/page/{i}?q=a&amp;b=c" '
+                      f'ADD_DATE="{1700000000 + i}">Bookmark &amp; page {i}</A>\n')
+        out.write('    </DL><p>\n</DL><p>\n')
+
+
+if __name__ == "__main__":
+    main()
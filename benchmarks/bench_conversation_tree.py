@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_tree import extract_messages
+
+#---- Configs
+TURNS = 400             # Messages on the active branch
+REGENERATIONS = 80      # Abandoned sibling replies next to each active message
+REPEATS = 20
+
+def main():
+    """
+    Compares the old dict-order extract_messages() against the shared tree
+    linearizer on one conversation with heavy regeneration use: time per
+    call and how many messages each one emits.
+    """
+
+    conv = make_conversation(TURNS, REGENERATIONS)
+    print(f"Synthetic conversation: {len(conv['mapping'])} nodes, {TURNS} on the active branch")
+    print("-" * 50)
+
+    runs = [
+        ('dict order (old)', lambda: extract_messages_dict_order(conv['mapping'])),
+        ('active branch', lambda: extract_messages(conv)),
+        ('all branches', lambda: extract_messages(conv, all_branches=True)),
+    ]
+    for label, func in runs:
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            messages = func()
+        elapsed = (time.perf_counter() - start) / REPEATS
+        print(f"{label:18} {elapsed * 1000:8.2f} ms  {len(messages):6} messages")
+
+    expected = [('user' if turn % 2 == 0 else 'assistant', f"final {turn}") for turn in range(TURNS)]
+    print(f"Active branch correct: {extract_messages(conv) == expected}")
+
+
+def extract_messages_dict_order(messages):
+    """The original extract_messages() for the mapping format."""
+    message_list = []
+    for m in messages.values():
+        if m is None:
+            continue
+        message_obj = m.get('message')
+        if not isinstance(message_obj, dict):
+            continue
+        content = message_obj.get('content', {})
+        parts = content.get('parts', [])
+        role = message_obj.get('author', {}).get('role', 'unknown')
+        for part in parts:
+            if part and part.strip():
+                message_list.append((role, part))
+    return message_list
+
+
+def make_conversation(turns, regenerations):
+    """Each turn's reply was regenerated many times; the kept version is always the last child."""
+    mapping = {'root': {'id': 'root', 'message': None, 'parent': None, 'children': []}}
+    parent = 'root'
+    for turn in range(turns):
+        role = 'user' if turn % 2 == 0 else 'assistant'
+        for attempt in range(regenerations):
+            add_node(mapping, f"{turn}-{attempt}", parent, role, f"draft {turn}.{attempt}")
+        node_id = f"{turn}-final"
+        add_node(mapping, node_id, parent, role, f"final {turn}")
+        parent = node_id
+    return {'title': 'Regenerated a lot', 'mapping': mapping, 'current_node': parent}
+
+
+def add_node(mapping, node_id, parent, role, text):
+    mapping[node_id] = {
+        'id': node_id,
+        'parent': parent,
+        'children': [],
+        'message': {'author': {'role': role}, 'content': {'content_type': 'text', 'parts': [text]}}
+    }
+    mapping[parent]['children'].append(node_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filename_registry import FilenameRegistry
+
+#---- Configs
+CONVERSATION_COUNT = 10000
+FILENAME = '2024-01-01_New chat.md'
+EXISTING_FILES = 200          # Same-named files already in the folder from an earlier run
+STAT_LATENCY_MS = 2.0         # Typical round trip for one stat on an SMB/NFS share
+LISTDIR_LATENCY_MS = 50.0     # One directory listing on the same share
+
+def main():
+    """
+    Compares the old get_unique_filepath() existence probing against
+    FilenameRegistry for CONVERSATION_COUNT conversations with the same
+    title on the same day. The folder is simulated in memory so stat calls
+    can be counted, then priced at the latency of a network mount.
+    """
+
+    print(f"{CONVERSATION_COUNT} conversations named '{FILENAME}', {EXISTING_FILES} copies already on disk")
+    print("-" * 50)
+
+    existing = existing_names(EXISTING_FILES)
+
+    folder = SimulatedFolder(existing)
+    start = time.perf_counter()
+    probed_names = []
+    for _ in range(CONVERSATION_COUNT):
+        path = probe_unique_filepath(os.path.join('out', FILENAME), folder)
+        folder.create(path)
+        probed_names.append(os.path.basename(path))
+    probe_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in existing:
+            open(os.path.join(tmp, name), 'w').close()
+        start = time.perf_counter()
+        registry = FilenameRegistry(tmp)
+        registry_names = [os.path.basename(registry.claim(FILENAME)) for _ in range(CONVERSATION_COUNT)]
+        registry_time = time.perf_counter() - start
+
+    probe_mount = folder.stat_calls * STAT_LATENCY_MS / 1000
+    registry_mount = LISTDIR_LATENCY_MS / 1000
+    print(f"Existence probing: {folder.stat_calls:>12,} stat calls  {probe_time:6.2f}s CPU  ~{probe_mount:9.0f}s on the mount")
+    print(f"FilenameRegistry:  {1:>12,} listdir     {registry_time:6.2f}s CPU  ~{registry_mount:9.2f}s on the mount")
+    print(f"Same filenames handed out: {probed_names == registry_names}")
+
+
+def probe_unique_filepath(filepath, folder):
+    """The original get_unique_filepath(), with os.path.exists swapped for the simulated folder."""
+    if not folder.exists(filepath):
+        return filepath
+
+    base_path = os.path.splitext(filepath)[0]
+    extension = os.path.splitext(filepath)[1]
+    count = 1
+
+    while True:
+        new_path = f"{base_path}_{count}{extension}"
+        if not folder.exists(new_path):
+            return new_path
+        count += 1
+
+
+class SimulatedFolder:
+    """Folder contents kept in a set, counting every exists() call."""
+
+    def __init__(self, names):
+        self.names = set(names)
+        self.stat_calls = 0
+
+    def exists(self, path):
+        self.stat_calls += 1
+        return os.path.basename(path) in self.names
+
+    def create(self, path):
+        self.names.add(os.path.basename(path))
+
+
+def existing_names(count):
+    base, extension = os.path.splitext(FILENAME)
+    return [FILENAME] + [f"{base}_{i}{extension}" for i in range(1, count)]
+
+
+if __name__ == "__main__":
+    main()
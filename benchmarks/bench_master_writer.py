@@ -0,0 +1,90 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import conversation_merger
+
+#---- Configs
+CONVERSATION_COUNT = 5000
+MESSAGES_PER_CONVERSATION = 40
+RANDOM_SEED = 42
+
+def main():
+    """
+    Compares writing the master file with json.dump(indent=2) against the
+    streaming MasterWriter in its indented, compact and JSON Lines modes.
+    """
+
+    conversations = make_conversations(CONVERSATION_COUNT)
+    print(f"Synthetic conversations: {len(conversations)} x {MESSAGES_PER_CONVERSATION} messages")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'master.json')
+        runs = [
+            ('json.dump indent=2', lambda: dump_all(conversations, path)),
+            ('MasterWriter indented', lambda: write_streaming(conversations, path, 'json', False)),
+            ('MasterWriter compact', lambda: write_streaming(conversations, path, 'json', True)),
+            ('MasterWriter jsonl', lambda: write_streaming(conversations, path, 'jsonl', True)),
+        ]
+        for label, func in runs:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{label:24} {elapsed:6.2f}s  {size_mb:7.1f} MB")
+
+
+def dump_all(conversations, path):
+    """The original save_master_json()."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(conversations, f, indent=2, ensure_ascii=False)
+
+
+def write_streaming(conversations, path, output_format, compact):
+    with conversation_merger.MasterWriter(path, output_format, compact) as writer:
+        for conv in conversations:
+            writer.write(conv)
+
+
+def make_conversations(count):
+    rng = random.Random(RANDOM_SEED)
+    words = ['python', 'data', 'model', 'query', 'réponse', 'function', 'error', 'list', 'file', 'loop']
+    conversations = []
+
+    for i in range(count):
+        mapping = {}
+        parent = None
+        for k in range(MESSAGES_PER_CONVERSATION):
+            node_id = f"{i}-{k}"
+            mapping[node_id] = {
+                'id': node_id,
+                'parent': parent,
+                'children': [f"{i}-{k + 1}"] if k < MESSAGES_PER_CONVERSATION - 1 else [],
+                'message': {
+                    'author': {'role': 'user' if k % 2 == 0 else 'assistant'},
+                    'create_time': 1700000000.0 + i * 60 + k,
+                    'content': {'content_type': 'text',
+                                'parts': [' '.join(rng.choices(words, k=rng.randint(5, 60)))]}
+                }
+            }
+            parent = node_id
+        conversations.append({
+            'id': f"conv-{i}",
+            'title': f"Conversation {i}",
+            'create_time': 1700000000.0 + i * 60,
+            'update_time': 1700000000.0 + i * 60 + MESSAGES_PER_CONVERSATION,
+            'mapping': mapping,
+            'current_node': parent
+        })
+
+    return conversations
+
+
+if __name__ == "__main__":
+    main()
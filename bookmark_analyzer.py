@@ -1,10 +1,38 @@
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from email.utils import parsedate_to_datetime
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from url_canonicalizer import canonical_url, group_by_canonical_url
 import requests
+import heapq
 import os
+import sqlite3
+import threading
+import time
 
 #----Configs
 BOOKMARKS_HTML = r'C:\Path\To\Your\bookmarks.html'  
 CLEANED_MD = r'C:\Path\To\Your\bookmarks_cleaned.md'  
+STREAMING_PARSER = True  # Parse the export incrementally instead of building a full soup tree
+CHECK_DEAD_LINKS = True
+MAX_WORKERS = 32    # Global limit on links checked at the same time
+MAX_PER_HOST = 4    # Limit on links checked at the same time against one host
+HOST_RATE_LIMIT = 2.0       # Requests per second sent to any one host
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2.0       # First retry delay without Retry-After, doubled on each retry
+MAX_RETRY_AFTER = 120       # Cap on how long a Retry-After header can hold up a host
+REQUEST_TIMEOUT = 5
+POOL_HOSTS_PER_WORKER = 64  # Keep-alive connections each worker holds on to
+GET_FALLBACK = True         # Retry with a zero-byte GET when a server rejects HEAD
+GET_FALLBACK_STATUSES = (400, 403, 405, 501)
+LINK_CACHE_DB = r'C:\Path\To\Your\link_cache.sqlite'  # Set to None to always check every link
+CACHE_TTL_DAYS = 14
+CACHE_MAX_ENTRIES = 200000
 
 def main():
     """
@@ -19,35 +47,21 @@ def main():
 
     print(f"Reading bookmarks from: {BOOKMARKS_HTML}")
     
-    with open(BOOKMARKS_HTML, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
-
-    bookmarks = []
-
-    
-    for a in soup.find_all('a'):
-        href = a.get('href')
-        name = a.text.strip()
-        add_date = a.get('add_date')
-        
-        if href:  
-            bookmarks.append({
-                'name': name, 
-                'url': href, 
-                'add_date': add_date
-            })
+    if STREAMING_PARSER:
+        bookmarks = list(iter_bookmarks(BOOKMARKS_HTML))
+    else:
+        bookmarks = parse_bookmarks_soup(BOOKMARKS_HTML)
 
     print(f"Found {len(bookmarks)} bookmarks.")
 
    
-    check_dead = True 
+    check_dead = CHECK_DEAD_LINKS
     
     if check_dead:
         print("Checking for dead links... (this may take a while)")
-        for i, bm in enumerate(bookmarks, 1):
-            bm['dead'] = is_dead_link(bm['url'])
-            if i % 10 == 0:  
-                print(f"Checked {i}/{len(bookmarks)} links...")
+        results = check_links_deduplicated([bm['url'] for bm in bookmarks])
+        for bm in bookmarks:
+            bm['dead'] = is_dead_result(results[bm['url']])
 
     
     print(f"Writing cleaned bookmarks to: {CLEANED_MD}")
@@ -67,13 +81,476 @@ def main():
     print(f"Successfully saved cleaned bookmarks to: {CLEANED_MD}")
 
 
-def is_dead_link(url):
+def parse_bookmarks_soup(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'html.parser')
+
+    bookmarks = []
+
+    
+    for a in soup.find_all('a'):
+        href = a.get('href')
+        name = a.text.strip()
+        add_date = a.get('add_date')
+        
+        if href:  
+            bookmarks.append({
+                'name': name, 
+                'url': href, 
+                'add_date': add_date
+            })
+
+    return bookmarks
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """
+    Incremental parser for the Netscape bookmark export format.
+    Completed bookmarks are collected in self.bookmarks, which the caller drains
+    after every feed() so only one chunk's worth is ever held in memory.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bookmarks = []
+        self.folders = []          # One entry per open <DL>, None when unnamed
+        self.pending_folder = None # Last <H3> title, claimed by the next <DL>
+        self.current = None
+        self.text = None
+
+    def folder_path(self):
+        return '/'.join(name for name in self.folders if name)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            attrs = dict(attrs)
+            self.current = {'url': attrs.get('href'), 'add_date': attrs.get('add_date')}
+            self.text = []
+        elif tag == 'h3':
+            self.text = []
+        elif tag == 'dl':
+            self.folders.append(self.pending_folder)
+            self.pending_folder = None
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self.current is not None:
+            if self.current['url']:
+                self.bookmarks.append({
+                    'name': ''.join(self.text).strip(),
+                    'url': self.current['url'],
+                    'add_date': self.current['add_date'],
+                    'folder': self.folder_path()
+                })
+            self.current = None
+            self.text = None
+        elif tag == 'h3' and self.text is not None:
+            self.pending_folder = ''.join(self.text).strip()
+            self.text = None
+        elif tag == 'dl' and self.folders:
+            self.folders.pop()
+
+    def handle_data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+
+def iter_bookmarks(path, chunk_size=1 << 16):
+    """Yields bookmarks (name, url, add_date, folder) one at a time from an export file."""
+    parser = NetscapeBookmarkParser()
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            yield from parser.bookmarks
+            parser.bookmarks.clear()
+    parser.close()
+    yield from parser.bookmarks
+
+
+def check_links_deduplicated(urls):
+    """
+    Checks one URL per canonical form and shares its result with every
+    near-duplicate (tracking parameters, trailing slashes, http/https, www.).
+    """
+    groups = group_by_canonical_url(dict.fromkeys(urls))
+    unique_count = sum(len(group) for group in groups.values())
+    print(f"URL canonicalization: {unique_count} distinct URLs collapse to {len(groups)}, "
+          f"saving {unique_count - len(groups)} network checks")
+
+    checked = check_links_cached([group[0] for group in groups.values()])
+    return {url: checked[group[0]] for group in groups.values() for url in group}
+
+
+def check_links_cached(urls):
+    """
+    Checks links, reusing results from the link cache that are still within
+    CACHE_TTL_DAYS. Only new or expired URLs go out to the network.
+    Transient failures are not cached, so one outage is re-checked next run.
+    """
+    if not LINK_CACHE_DB:
+        return check_links(urls)
+
+    cache = LinkCache(LINK_CACHE_DB, CACHE_TTL_DAYS * 86400, CACHE_MAX_ENTRIES)
+    try:
+        unique_urls = list(dict.fromkeys(urls))
+        results = cache.lookup(unique_urls)
+        to_check = [url for url in unique_urls if url not in results]
+        print(f"Link cache: {len(results)} fresh, {len(to_check)} to check")
+
+        if to_check:
+            checked = check_links(to_check)
+            cache.store(checked)
+            results.update(checked)
+
+        cache.evict()
+        return results
+    finally:
+        cache.close()
+
+
+def check_links(urls, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST):
+    """
+    Checks links concurrently and returns a dict of url -> check result.
+    URLs are queued per host and handed to the thread pool round-robin across
+    hosts, so a slow host only ever ties up max_per_host workers. Each host is
+    also held to HOST_RATE_LIMIT requests per second, and 429/503 answers are
+    retried after the host's Retry-After delay (or an exponential backoff).
+    Links that are not http(s) or have no host (javascript: bookmarklets,
+    place: queries) are reported as failed without going through the queues.
+    """
+    queues = defaultdict(deque)
+    results = {}
+    for url in dict.fromkeys(urls):
+        if is_network_url(url):
+            queues[get_host(url)].append((url, 0))
+        else:
+            results[url] = {'status': None, 'final_url': url}
+    skipped = len(results)
+
+    total = skipped + sum(len(queue) for queue in queues.values())
+    interval = 1.0 / HOST_RATE_LIMIT if HOST_RATE_LIMIT else 0.0
+    active = defaultdict(int)
+    next_allowed = defaultdict(float)  # Earliest time the host may be hit again
+    ready = deque()                    # Hosts that can be sent a request right now
+    delayed = []                       # Heap of (time, seq, host) waiting on their budget
+    scheduled = set()                  # Hosts currently in ready or delayed
+    seq = 0
+    retries = 0
+    pending = {}
+    start = time.perf_counter()
+
+    def schedule(host, now):
+        nonlocal seq
+        if host in scheduled or not queues[host] or active[host] >= max_per_host:
+            return
+        scheduled.add(host)
+        if next_allowed[host] > now:
+            seq += 1
+            heapq.heappush(delayed, (next_allowed[host], seq, host))
+        else:
+            ready.append(host)
+
+    now = time.monotonic()
+    for host in queues:
+        schedule(host, now)
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while ready or delayed or pending:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                host = heapq.heappop(delayed)[2]
+                scheduled.discard(host)
+                schedule(host, now)
+
+            # Fill free workers from hosts that still have capacity and budget
+            while ready and len(pending) < max_workers:
+                host = ready.popleft()
+                scheduled.discard(host)
+                if next_allowed[host] > now:
+                    schedule(host, now)
+                    continue
+                url, attempt = queues[host].popleft()
+                active[host] += 1
+                next_allowed[host] = now + interval
+                pending[pool.submit(check_link, url)] = (url, host, attempt)
+                schedule(host, now)
+
+            timeout = max(delayed[0][0] - now, 0.0) if delayed else None
+            if not pending:
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                url, host, attempt = pending.pop(future)
+                active[host] -= 1
+                result = future.result()
+
+                if result['status'] in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    delay = result.get('retry_after') or BACKOFF_SECONDS * 2 ** attempt
+                    next_allowed[host] = max(next_allowed[host], now + delay)
+                    queues[host].appendleft((url, attempt + 1))
+                    retries += 1
+                else:
+                    results[url] = result
+                    if len(results) % 100 == 0:
+                        print(f"Checked {len(results)}/{total} links...")
+
+                schedule(host, now)
+
+    elapsed = time.perf_counter() - start
+    checked = len(results) - skipped
+    rate = checked / elapsed if elapsed > 0 else 0.0
+    stats = close_sessions()
+    print(f"Checked {checked} links across {len(queues)} hosts "
+          f"in {elapsed:.1f}s ({rate:.1f} URLs/sec, {retries} rate-limit retries)")
+    if skipped:
+        print(f"Skipped {skipped} links that are not http(s) or have no host")
+    print(f"Connections: {stats['opened']} opened, {stats['reused']} reused, "
+          f"{stats['fallbacks']} HEAD->GET fallbacks")
+    return results
+
+
+def is_network_url(url):
+    try:
+        parts = urlsplit(url)
+        return parts.scheme.lower() in ('http', 'https') and bool(parts.hostname)
+    except ValueError:
+        return False
+
+
+def get_host(url):
+    try:
+        return (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+
+class LinkCache:
+    """
+    On-disk cache of link check results keyed by canonical URL.
+    Stores the status code (None when the request failed), the final URL after
+    redirects and the time of the check.
+    """
+
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS links ('
+            'url TEXT PRIMARY KEY, status INTEGER, final_url TEXT, checked_at REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS links_checked_at ON links (checked_at)')
+
+    def lookup(self, urls):
+        """Returns url -> result for every URL with an unexpired cache entry."""
+        keys = {}
+        for url in urls:
+            keys.setdefault(canonical_url(url), []).append(url)
+
+        cutoff = time.time() - self.ttl_seconds
+        key_list = list(keys)
+        results = {}
+        for start in range(0, len(key_list), 500):
+            batch = key_list[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f'SELECT url, status, final_url FROM links '
+                f'WHERE checked_at >= ? AND url IN ({placeholders})',
+                [cutoff, *batch]
+            )
+            for key, status, final_url in rows:
+                for url in keys[key]:
+                    results[url] = {'status': status, 'final_url': final_url}
+        return results
+
+    def store(self, results):
+        """Caches results, except timeouts, connection errors and rate limits that outlasted the retries."""
+        now = time.time()
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO links (url, status, final_url, checked_at) VALUES (?, ?, ?, ?)',
+            [(canonical_url(url), result['status'], result['final_url'], now)
+             for url, result in results.items() if not is_transient_status(result['status'])]
+        )
+        self.conn.commit()
+
+    def evict(self):
+        """Drops the oldest entries once the cache grows past max_entries."""
+        (count,) = self.conn.execute('SELECT COUNT(*) FROM links').fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                'DELETE FROM links WHERE url IN '
+                '(SELECT url FROM links ORDER BY checked_at LIMIT ?)',
+                (count - self.max_entries,)
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """Pool whose connections count every socket they connect, including reconnects."""
+
+    class ConnectionCls(HTTPConnectionPool.ConnectionCls):
+        def connect(self):
+            super().connect()
+            count_connect()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+
+    class ConnectionCls(HTTPSConnectionPool.ConnectionCls):
+        def connect(self):
+            super().connect()
+            count_connect()
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps count of requests sent and opens its connections
+    through the counting pools. urllib3's own num_connections only counts
+    connection objects, so a pooled connection that silently reconnects after
+    the server closed it would look reused.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.disposed_requests = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+        dispose = self.poolmanager.pools.dispose_func
+
+        # Host pools are evicted when the pool manager is full, so tally their
+        # counters before they are thrown away
+        def record_and_dispose(pool):
+            self.disposed_requests += pool.num_requests
+            if dispose:
+                dispose(pool)
+
+        self.poolmanager.pools.dispose_func = record_and_dispose
+
+    def requests_sent(self):
+        pools = [self.poolmanager.pools[key] for key in self.poolmanager.pools.keys()]
+        return self.disposed_requests + sum(pool.num_requests for pool in pools)
+
+
+_thread_state = threading.local()
+_sessions = []
+_stats_lock = threading.Lock()
+_fallback_count = 0
+_connect_count = 0
+
+
+def count_connect():
+    global _connect_count
+    with _stats_lock:
+        _connect_count += 1
+
+
+def get_session():
+    """Returns the calling thread's keep-alive session, creating it on first use."""
+    session = getattr(_thread_state, 'session', None)
+    if session is None or session not in _sessions:
+        session = requests.Session()
+        adapter = CountingAdapter(pool_connections=POOL_HOSTS_PER_WORKER, pool_maxsize=1)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with _stats_lock:
+            _sessions.append(session)
+        _thread_state.session = session
+    return session
+
+
+def close_sessions():
+    """Closes all worker sessions and returns their combined connection counters."""
+    global _fallback_count, _connect_count
+    with _stats_lock:
+        sessions = list(_sessions)
+        _sessions.clear()
+        fallbacks, _fallback_count = _fallback_count, 0
+        opened, _connect_count = _connect_count, 0
+
+    sent = 0
+    for session in sessions:
+        sent += session.get_adapter('https://').requests_sent()
+        session.close()
+
+    return {'opened': opened, 'reused': sent - opened, 'fallbacks': fallbacks}
+
+
+def check_link(url):
+    """
+    Returns the status code (None on failure) and final URL for a link.
+    Servers that reject HEAD get a second chance with a GET for the first byte,
+    whose body is never read.
+    """
+    global _fallback_count
+    session = get_session()
+    try:
+        response = session.head(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
+        if not (GET_FALLBACK and response.status_code in GET_FALLBACK_STATUSES):
+            return link_result(response)
+    except (requests.ConnectionError, requests.Timeout,
+            requests.exceptions.InvalidURL, requests.exceptions.InvalidSchema,
+            requests.exceptions.MissingSchema):
+        return {'status': None, 'final_url': url}
+    except Exception:
+        if not GET_FALLBACK:
+            return {'status': None, 'final_url': url}
+
+    with _stats_lock:
+        _fallback_count += 1
     try:
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        return response.status_code >= 400
+        with session.get(url, timeout=REQUEST_TIMEOUT, allow_redirects=True,
+                         stream=True, headers={'Range': 'bytes=0-0'}) as response:
+            return link_result(response)
     except Exception:
-        return True
+        return {'status': None, 'final_url': url}
+
+
+def link_result(response):
+    return {
+        'status': response.status_code,
+        'final_url': response.url,
+        'retry_after': parse_retry_after(response.headers.get('Retry-After'))
+    }
+
+
+def parse_retry_after(value):
+    """Converts a Retry-After header (seconds or HTTP date) to seconds, capped at MAX_RETRY_AFTER."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = retry_at.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def is_transient_status(status):
+    return status is None or status in RETRY_STATUSES
+
+
+def is_dead_result(result):
+    return result['status'] is None or result['status'] >= 400
+
+
+def is_dead_link(url):
+    return is_dead_result(check_link(url))
 
 
 if __name__ == "__main__":
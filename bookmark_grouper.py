@@ -1,10 +1,20 @@
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from url_canonicalizer import deduplicate_bookmarks
+import hashlib
+import json
 import re
 import os
 
 #----- Configs
 BOOKMARKS_MD = r'C:\Path\To\Your\bookmarks_cleaned.md'  
 OUTPUT_HTML = r'C:\Path\To\Your\bookmarks_grouped.html'  
+DEDUPLICATE_URLS = True      # List each canonical URL once
+CATEGORIZE_WORKERS = None    # Worker processes for large inputs (None = one per CPU)
+PARALLEL_THRESHOLD = 20000   # Smaller inputs are categorized serially
+WRITE_BUFFER_SIZE = 1 << 20  # Bytes of grouped HTML buffered per disk write
+WRITE_BATCH_SIZE = 4096      # Bookmark lines joined per out.write() call
+CATEGORY_INDEX = r'C:\Path\To\Your\bookmark_categories.json'  # Set to None to recategorize everything
 
 # Categorization groups --> customize these categories like you wanna
 BOOKMARK_GROUPS = {
@@ -104,9 +114,16 @@ def main():
         print("No bookmarks found in the input file.")
         return
     
+    if DEDUPLICATE_URLS:
+        bookmarks, duplicates = deduplicate_bookmarks(bookmarks)
+        print(f"Removed {duplicates} duplicate URLs.")
+    
     print(f"Found {len(bookmarks)} bookmarks to categorize...")
     
-    grouped_bookmarks = categorize_bookmarks(bookmarks)
+    if CATEGORY_INDEX:
+        grouped_bookmarks = categorize_with_index(bookmarks)
+    else:
+        grouped_bookmarks = categorize_bookmarks(bookmarks)
     
     generate_grouped_html(grouped_bookmarks)
     
@@ -135,11 +152,75 @@ def parse_bookmarks_from_markdown():
     return bookmarks
 
 
-def categorize_bookmarks(bookmarks):
+def categorize_bookmarks(bookmarks, workers=CATEGORIZE_WORKERS):
+    return group_by_category(bookmarks, assign_categories(bookmarks, workers))
+
+
+def categorize_with_index(bookmarks, index_path=CATEGORY_INDEX):
+    """
+    Categorizes bookmarks using the persisted category index, so only new or
+    changed bookmarks go through the keyword matcher. The index is thrown away
+    whenever BOOKMARK_GROUPS changes.
+    """
+    fingerprint = keyword_fingerprint(BOOKMARK_GROUPS)
+    index = load_category_index(index_path, fingerprint)
+
+    keys = [bookmark_key(bookmark) for bookmark in bookmarks]
+    missing = {}
+    for key, bookmark in zip(keys, bookmarks):
+        if key not in index:
+            missing.setdefault(key, bookmark)
+
+    if missing:
+        for key, category in zip(missing, assign_categories(list(missing.values()))):
+            index[key] = category
+
+    print(f"Category index: {len(bookmarks) - len(missing)} reused, {len(missing)} categorized")
+
+    # Only keep entries for bookmarks that still exist
+    index = {key: index[key] for key in keys}
+    save_category_index(index_path, fingerprint, index)
+
+    return group_by_category(bookmarks, [index[key] for key in keys])
+
+
+def keyword_fingerprint(groups):
+    # Category order decides ties, so it is part of the fingerprint
+    table = json.dumps(list(groups.items()), ensure_ascii=False)
+    return hashlib.sha256(table.encode('utf-8')).hexdigest()
+
+
+def bookmark_key(bookmark):
+    return hashlib.sha1(f"{bookmark['url']}\n{bookmark['title']}".encode('utf-8')).hexdigest()
+
+
+def load_category_index(index_path, fingerprint):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get('fingerprint') != fingerprint:
+        print("Category index is missing or out of date, recategorizing everything.")
+        return {}
+    return data.get('categories', {})
+
+
+def save_category_index(index_path, fingerprint, index):
+    temp_path = f"{index_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'categories': index}, f, ensure_ascii=False)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        print(f"Error saving category index: {e}")
+
+
+def group_by_category(bookmarks, categories):
     grouped = {}
     
-    for bookmark in bookmarks:
-        category = find_best_category(bookmark)
+    for bookmark, category in zip(bookmarks, categories):
         
         if category not in grouped:
             grouped[category] = []
@@ -153,30 +234,135 @@ def categorize_bookmarks(bookmarks):
     return sorted_grouped
 
 
+def assign_categories(bookmarks, workers=CATEGORIZE_WORKERS):
+    """
+    Returns the category of each bookmark, in input order.
+    Large inputs are split into chunks and categorized in a process pool;
+    pool.map keeps chunk order, so the result matches the serial path.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(bookmarks) < PARALLEL_THRESHOLD:
+        return [find_best_category(bookmark) for bookmark in bookmarks]
+
+    chunk_size = choose_chunk_size(len(bookmarks), workers)
+    chunks = [
+        [(bookmark['title'], bookmark['url']) for bookmark in bookmarks[start:start + chunk_size]]
+        for start in range(0, len(bookmarks), chunk_size)
+    ]
+
+    categories = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_category_worker,
+                             initargs=(BOOKMARK_GROUPS,)) as pool:
+        for chunk_categories in pool.map(categorize_chunk, chunks):
+            categories.extend(chunk_categories)
+    return categories
+
+
+def choose_chunk_size(total, workers):
+    # About four chunks per worker evens out uneven chunks, without
+    # letting per-chunk overhead dominate on small inputs
+    return max(1000, -(-total // (workers * 4)))
+
+
+def init_category_worker(groups):
+    global _keyword_matcher
+    _keyword_matcher = KeywordMatcher(groups)
+
+
+def categorize_chunk(chunk):
+    matcher = get_keyword_matcher()
+    return [matcher.best_category(f"{title} {url}".lower()) for title, url in chunk]
+
+
 def find_best_category(bookmark):
 
     # Combine title and URL for analysis
     search_text = f"{bookmark['title']} {bookmark['url']}".lower()
     
-    # Check each category for keyword matches
-    best_category = 'Misc'  
-    max_matches = 0
-    
-    for category, keywords in BOOKMARK_GROUPS.items():
-        matches = sum(1 for keyword in keywords if keyword.lower() in search_text)
-        
-        if matches > max_matches:
-            max_matches = matches
-            best_category = category
-    
-    return best_category
+    return get_keyword_matcher().best_category(search_text)
+
+
+_keyword_matcher = None
+
+def get_keyword_matcher():
+    """Returns the matcher for BOOKMARK_GROUPS, compiling it on first use."""
+    global _keyword_matcher
+    if _keyword_matcher is None:
+        _keyword_matcher = KeywordMatcher(BOOKMARK_GROUPS)
+    return _keyword_matcher
 
 
-def generate_grouped_html(grouped_bookmarks):
+class KeywordMatcher:
+    """
+    Scores text against every category in one regex pass.
+    All keywords are compiled into a single trie-shaped pattern wrapped in a
+    lookahead, so each position of the text reports the longest keyword that
+    starts there. Shorter keywords that are prefixes of that match are credited
+    too, which gives the same counts as testing every keyword as a substring.
+    """
+
+    def __init__(self, groups):
+        self.categories = list(groups)
+        self.keyword_categories = {}
+        for index, keywords in enumerate(groups.values()):
+            for keyword in keywords:
+                self.keyword_categories.setdefault(keyword.lower(), []).append(index)
+
+        keywords = [keyword for keyword in self.keyword_categories if keyword]
+        self.prefixes = {
+            keyword: [other for other in keywords if keyword.startswith(other)]
+            for keyword in keywords
+        }
+        self.pattern = re.compile(f"(?=({build_trie_pattern(keywords)}))") if keywords else None
+
+    def match_counts(self, text):
+        """Returns the number of matching keywords per category, in category order."""
+        found = set()
+        for match in (self.pattern.finditer(text) if self.pattern else ()):
+            found.update(self.prefixes[match.group(1)])
+
+        counts = [0] * len(self.categories)
+        for keyword in found:
+            for index in self.keyword_categories[keyword]:
+                counts[index] += 1
+        return counts
+
+    def best_category(self, text):
+        # First category with the most matches wins, as in the original scan
+        best_category = 'Misc'
+        max_matches = 0
+        for category, matches in zip(self.categories, self.match_counts(text)):
+            if matches > max_matches:
+                max_matches = matches
+                best_category = category
+        return best_category
+
+
+def build_trie_pattern(keywords):
+    """Builds a regex alternation that shares common prefixes and prefers longer keywords."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A keyword ends here, but try to extend it to a longer one first
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+def generate_grouped_html(grouped_bookmarks, output_path=None):
     total_bookmarks = sum(len(bookmarks) for bookmarks in grouped_bookmarks.values())
     
     try:
-        with open(OUTPUT_HTML, 'w', encoding='utf-8') as out:
+        with open(output_path or OUTPUT_HTML, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as out:
             write_html_header(out, total_bookmarks)
             for category, bookmarks in grouped_bookmarks.items():
                 write_category_section(out, category, bookmarks)
@@ -187,28 +373,28 @@ def generate_grouped_html(grouped_bookmarks):
 
 def write_html_header(out, total_bookmarks):
     """Writes the HTML file header."""
-    out.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\\n')
-    out.write('<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\\n')
-    out.write('<TITLE>Grouped Bookmarks</TITLE>\\n')
-    out.write('<H1>Grouped Bookmarks</H1>\\n')
-    out.write(f'<p>Total bookmarks: {total_bookmarks}</p>\\n')
-    out.write('<DL><p>\\n')
+    out.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n'
+              '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+              '<TITLE>Grouped Bookmarks</TITLE>\n'
+              '<H1>Grouped Bookmarks</H1>\n'
+              f'<p>Total bookmarks: {total_bookmarks}</p>\n'
+              '<DL><p>\n')
 
 
 def write_category_section(out, category, bookmarks):
-    """Writes a category section with its bookmarks."""
-    out.write(f'<DT><H3>{category} ({len(bookmarks)})</H3>\\n')
-    out.write('<DL><p>\\n')
-    
-    for bookmark in bookmarks:
-        safe_title = escape_html(bookmark['title'])
-        safe_url = escape_html(bookmark['url'])
-        out.write(f'<DT><A HREF="{safe_url}">{safe_title}</A>\\n')
-    out.write('</DL><p>\\n')
+    """Writes a category section with its bookmarks, a batch of lines per write."""
+    out.write(f'<DT><H3>{category} ({len(bookmarks)})</H3>\n<DL><p>\n')
+    
+    for start in range(0, len(bookmarks), WRITE_BATCH_SIZE):
+        out.write(''.join([
+            f'<DT><A HREF="{escape_html(bookmark["url"])}">{escape_html(bookmark["title"])}</A>\n'
+            for bookmark in bookmarks[start:start + WRITE_BATCH_SIZE]
+        ]))
+    out.write('</DL><p>\n')
 
 def write_html_footer(out):
     """Writes the HTML file footer."""
-    out.write('</DL><p>\\n')
+    out.write('</DL><p>\n')
 
 def escape_html(text):
     return (text.replace('&', '&amp;')
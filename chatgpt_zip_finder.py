@@ -1,11 +1,43 @@
 import os
+import hashlib
+import json
+import struct
+import time
 import zipfile
 import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from filename_registry import FilenameRegistry
+
+try:
+    import fcntl  # Reflinks need the FICLONE ioctl, only available on Linux/Unix
+except ImportError:
+    fcntl = None
 
 #------ Configs
 SOURCE_FOLDER = r'C:\Path\To\Your\Source\Folder'  
 DEST_FOLDER = r'C:\Path\To\Your\Destination\Folder'  
+PROBE_CACHE_JSON = r'C:\Path\To\Your\zip_probe_cache.json'  # Set to None to probe every ZIP on each run
+TARGET_MEMBER = 'conversations.json'
+SCAN_WORKERS = 16           # Threads listing folders, probing and hashing; mostly waiting on I/O
+DEDUPLICATE_EXPORTS = True  # Copy identical exports once, skipping ones already in DEST_FOLDER
+HASH_CHUNK_SIZE = 1 << 20
+# 'copy' always writes a full copy. 'auto' tries a reflink (copy-on-write clone),
+# then a hardlink (the organized file shares the source's data and metadata),
+# then a kernel-side copy, so exports on the same filesystem take no extra space
+PLACEMENT_MODE = 'copy'
+FICLONE = 0x40049409  # Linux ioctl number for cloning a whole file
+
+# ZIP record layouts, as in the zipfile module
+_CENTRAL_HEADER_FORMAT = '<4s4B4HL2L5H2L'
+_CENTRAL_HEADER_SIZE = struct.calcsize(_CENTRAL_HEADER_FORMAT)
+_END_RECORD_FORMAT = '<4s4H2LH'
+_END_RECORD_SIZE = struct.calcsize(_END_RECORD_FORMAT)
+_ZIP64_LOCATOR_FORMAT = '<4sLQL'
+_ZIP64_LOCATOR_SIZE = struct.calcsize(_ZIP64_LOCATOR_FORMAT)
+_ZIP64_END_RECORD_FORMAT = '<4sQ2H2L4Q'
+_ZIP64_END_RECORD_SIZE = struct.calcsize(_ZIP64_END_RECORD_FORMAT)
 
 def main():
     """
@@ -21,50 +53,386 @@ def main():
     processed_count = 0
     skipped_count = 0
     error_count = 0
+    duplicate_count = 0
+    placements = defaultdict(int)
+    bytes_written = 0
+    logical_bytes = 0
 
     print(f"Scanning for ChatGPT exports in: {SOURCE_FOLDER}")
     print(f"Organizing files to: {DEST_FOLDER}")
     print("-" * 50)
 
-    for root, dirs, files in os.walk(SOURCE_FOLDER):
-        for file in files:
-            if file.lower().endswith('.zip'):
-                zip_path = os.path.join(root, file)
-                try:
-                    with zipfile.ZipFile(zip_path, 'r') as z:
-                        if 'conversations.json' in z.namelist():
-                            date = extract_date_from_filename(file)
-                            
-                            #Fallback to file modification time if no date
-                            if not date:
-                                timestamp = os.path.getmtime(zip_path)
-                                date = datetime.fromtimestamp(timestamp)
-
-                            new_name = f"ChatGPT_Export_{date.strftime('%Y-%m-%d')}.zip"
-                            dest_path = os.path.join(DEST_FOLDER, new_name)
-                            
-                            # Handle duplicates
-                            dest_path = get_unique_filename(dest_path)
-
-                            shutil.copy(zip_path, dest_path)
-                            print(f"[OK] {os.path.basename(zip_path)} --> {os.path.basename(dest_path)}")
-                            processed_count += 1
-                        else:
-                            print(f"[SKIP] {os.path.basename(zip_path)} (no conversations.json found)")
-                            skipped_count += 1
-
-                except zipfile.BadZipFile:
-                    print(f"[ERROR] {os.path.basename(zip_path)} (bad zip file)")
-                    error_count += 1
-                except Exception as e:
-                    print(f"[ERROR] {os.path.basename(zip_path)} ({str(e)})")
-                    error_count += 1
+    cache = load_probe_cache() if PROBE_CACHE_JSON else {}
+    new_cache = {}
+    exports = []
+
+    # Walk and probe in parallel, then report and copy in path order so the
+    # result never depends on which thread finished first
+    zip_files = scan_for_zips(SOURCE_FOLDER, exclude=DEST_FOLDER)
+    start = time.perf_counter()
+    probes, probed_count = probe_archives(zip_files, cache)
+    probe_seconds = time.perf_counter() - start
+
+    for zip_path, stat, result in probes:
+        if isinstance(result, zipfile.BadZipFile):
+            print(f"[ERROR] {os.path.basename(zip_path)} (bad zip file)")
+            error_count += 1
+            continue
+        if isinstance(result, Exception):
+            print(f"[ERROR] {os.path.basename(zip_path)} ({str(result)})")
+            error_count += 1
+            continue
+
+        new_cache[zip_path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'has_conversations': result
+        }
+        if result:
+            exports.append((zip_path, stat))
+        else:
+            print(f"[SKIP] {os.path.basename(zip_path)} (no conversations.json found)")
+            skipped_count += 1
+
+    duplicates, digests = find_duplicate_exports(exports, DEST_FOLDER, cache) if DEDUPLICATE_EXPORTS else ({}, {})
+    # Digests are cached next to the probe results, and for files in DEST_FOLDER
+    for path, (stat, digest) in digests.items():
+        new_cache.setdefault(path, {'size': stat.st_size, 'mtime': stat.st_mtime})['sha256'] = digest
+    registry = FilenameRegistry(DEST_FOLDER)
+
+    for zip_path, stat in exports:
+        file = os.path.basename(zip_path)
+        if zip_path in duplicates:
+            print(f"[DUPLICATE] {file} (same content as {duplicates[zip_path]})")
+            duplicate_count += 1
+            continue
+        try:
+            date = extract_date_from_filename(file)
+            
+            #Fallback to file modification time if no date
+            if not date:
+                date = datetime.fromtimestamp(stat.st_mtime)
+
+            new_name = f"ChatGPT_Export_{date.strftime('%Y-%m-%d')}.zip"
+            
+            # Handle duplicates
+            dest_path = registry.claim(new_name)
+
+            method, written = place_file(zip_path, dest_path)
+            if zip_path in digests:
+                dest_stat = os.stat(dest_path)
+                new_cache[dest_path] = {'size': dest_stat.st_size, 'mtime': dest_stat.st_mtime, 'sha256': digests[zip_path][1]}
+            placements[method] += 1
+            bytes_written += written
+            logical_bytes += stat.st_size
+            print(f"[OK] {file} --> {os.path.basename(dest_path)}" + (f" ({method})" if method != 'copy' else ""))
+            processed_count += 1
+        except Exception as e:
+            print(f"[ERROR] {file} ({str(e)})")
+            error_count += 1
 
     print("-" * 50)
     print(f"Processing complete!")
     print(f"Processed: {processed_count}")
     print(f"Skipped: {skipped_count}")
+    print(f"Duplicates not copied: {duplicate_count}")
     print(f"Errors: {error_count}")
+    if processed_count:
+        methods = ', '.join(f"{method}: {count}" for method, count in sorted(placements.items()))
+        print(f"Placed by {methods}")
+        print(f"Bytes written: {bytes_written / 1e6:.1f} MB of {logical_bytes / 1e6:.1f} MB organized")
+    rate = probed_count / probe_seconds if probe_seconds else 0.0
+    print(f"Archives probed: {probed_count} in {probe_seconds:.2f}s ({rate:.0f}/s), "
+          f"{len(probes) - probed_count} unchanged from cache")
+
+    if PROBE_CACHE_JSON:
+        save_probe_cache(new_cache)
+
+
+def scan_for_zips(folder, exclude=None, workers=SCAN_WORKERS):
+    """
+    Walks folder with os.scandir, listing subdirectories in parallel since on
+    a network share each listing mostly waits on the server. Returns
+    [(zip_path, stat)] sorted by path, with stat None where it failed.
+    Like os.walk, unreadable folders and symlinked folders are skipped.
+    """
+    excluded = os.path.normcase(os.path.abspath(exclude)) if exclude else None
+    found = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan_directory, folder)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                zips, subdirs = future.result()
+                found.extend(zips)
+                for subdir in subdirs:
+                    if os.path.normcase(os.path.abspath(subdir)) != excluded:
+                        pending.add(pool.submit(scan_directory, subdir))
+
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def scan_directory(path):
+    zips = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith('.zip'):
+                        zips.append((entry.path, entry.stat()))
+                except OSError:
+                    if entry.name.lower().endswith('.zip'):
+                        zips.append((entry.path, None))
+    except OSError:
+        pass
+    return zips, subdirs
+
+
+def probe_archives(zip_files, cache, workers=SCAN_WORKERS):
+    """
+    Returns ([(zip_path, stat, has_conversations or the exception raised)],
+    number of archives actually probed), in the order given. Archives whose
+    size and mtime match the cache are not opened; the rest are probed in a
+    thread pool.
+    """
+    results = [None] * len(zip_files)
+    to_probe = []
+    for i, (zip_path, stat) in enumerate(zip_files):
+        entry = cache.get(zip_path)
+        if (stat and entry and 'has_conversations' in entry and
+                entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime):
+            results[i] = (zip_path, stat, entry['has_conversations'])
+        else:
+            to_probe.append(i)
+
+    def probe(i):
+        zip_path, stat = zip_files[i]
+        try:
+            stat = stat or os.stat(zip_path)
+            return zip_path, stat, zip_contains(zip_path, TARGET_MEMBER)
+        except Exception as e:
+            return zip_path, stat, e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, result in zip(to_probe, pool.map(probe, to_probe)):
+            results[i] = result
+    return results, len(to_probe)
+
+
+def find_duplicate_exports(exports, dest_folder, cache=None, workers=SCAN_WORKERS):
+    """
+    Maps each export whose content matches an earlier export, or a ZIP
+    already in dest_folder, to the path of that file. Files are grouped by
+    size first and only sizes shared by two or more files are hashed, so a
+    unique export is never read; a file whose size and mtime match its cache
+    entry reuses the SHA-256 stored there. Returns (duplicates,
+    {path: (stat, sha256)} for every file hashed or taken from the cache).
+    """
+    existing = []
+    with os.scandir(dest_folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith('.zip') and entry.is_file():
+                existing.append((entry.path, entry.stat()))
+
+    by_size = defaultdict(list)
+    for path, stat in existing + exports:
+        by_size[stat.st_size].append(path)
+    export_paths = {path for path, _ in exports}
+    candidates = [
+        path for paths in by_size.values()
+        if len(paths) > 1 and export_paths.intersection(paths)
+        for path in paths
+    ]
+
+    stats = dict(existing + exports)
+    digests = {}
+    for path in candidates:
+        digest = cached_digest(cache or {}, path, stats[path])
+        if digest:
+            digests[path] = digest
+    to_hash = [path for path in candidates if path not in digests]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests.update(zip(to_hash, pool.map(file_digest, to_hash)))
+    if candidates:
+        print(f"Hashed {len(to_hash)} same-size files, {len(candidates) - len(to_hash)} unchanged from cache")
+
+    first_seen = {}
+    duplicates = {}
+    for path, _ in existing + exports:
+        digest = digests.get(path)
+        if digest is None:
+            continue
+        original = first_seen.setdefault(digest, path)
+        if original != path:
+            duplicates[path] = original
+    known = {path: (stats[path], digest) for path, digest in digests.items() if digest}
+    return duplicates, known
+
+
+def cached_digest(cache, path, stat):
+    entry = cache.get(path)
+    if entry and entry.get('sha256') and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+    return None
+
+
+def file_digest(path):
+    """Returns the SHA-256 of a file, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def zip_contains(zip_path, member):
+    """
+    Checks whether a ZIP has an entry named member by reading only the
+    end-of-central-directory record and the central directory, never the
+    compressed data. Raises zipfile.BadZipFile if the archive is malformed.
+    """
+    target = member.encode('utf-8')
+    with open(zip_path, 'rb') as f:
+        cd_offset, cd_size = read_central_directory_location(f)
+        f.seek(cd_offset)
+        directory = f.read(cd_size)
+    if len(directory) < cd_size:
+        raise zipfile.BadZipFile("Truncated central directory")
+
+    pos = 0
+    while pos + _CENTRAL_HEADER_SIZE <= len(directory):
+        header = struct.unpack_from(_CENTRAL_HEADER_FORMAT, directory, pos)
+        if header[0] != b'PK\x01\x02':
+            raise zipfile.BadZipFile("Bad magic number for central directory")
+        name_start = pos + _CENTRAL_HEADER_SIZE
+        name_length, extra_length, comment_length = header[12:15]
+        if directory[name_start:name_start + name_length] == target:
+            return True
+        pos = name_start + name_length + extra_length + comment_length
+    return False
+
+
+def read_central_directory_location(f):
+    """Returns (offset, size) of the central directory from the records at the end of the file."""
+    file_size = f.seek(0, os.SEEK_END)
+    # The end record sits in the last 22 bytes unless followed by a comment of up to 64 KiB
+    tail_size = min(file_size, _END_RECORD_SIZE + 0xFFFF + _ZIP64_LOCATOR_SIZE)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+
+    end_pos = tail.rfind(b'PK\x05\x06', 0, len(tail) - _END_RECORD_SIZE + 4)
+    if end_pos < 0:
+        raise zipfile.BadZipFile("File is not a zip file")
+    cd_size = struct.unpack_from(_END_RECORD_FORMAT, tail, end_pos)[5]
+    end_offset = file_size - tail_size + end_pos
+
+    locator_pos = end_pos - _ZIP64_LOCATOR_SIZE
+    if locator_pos >= 0 and tail[locator_pos:locator_pos + 4] == b'PK\x06\x07':
+        # Read the ZIP64 record just before the locator rather than at the
+        # offset it stores, which prepended data would have shifted
+        zip64_offset = file_size - tail_size + locator_pos - _ZIP64_END_RECORD_SIZE
+        if zip64_offset < 0:
+            raise zipfile.BadZipFile("Corrupt ZIP64 end of central directory record")
+        f.seek(zip64_offset)
+        zip64_record = f.read(_ZIP64_END_RECORD_SIZE)
+        if len(zip64_record) < _ZIP64_END_RECORD_SIZE or zip64_record[:4] != b'PK\x06\x06':
+            raise zipfile.BadZipFile("Corrupt ZIP64 end of central directory record")
+        cd_size = struct.unpack(_ZIP64_END_RECORD_FORMAT, zip64_record)[8]
+        end_offset = zip64_offset
+
+    # The directory ends where the end record starts. Working back from there
+    # also handles archives with data prepended (self-extractors)
+    cd_offset = end_offset - cd_size
+    if cd_offset < 0:
+        raise zipfile.BadZipFile("Bad offset for central directory")
+    return cd_offset, cd_size
+
+
+def load_probe_cache():
+    try:
+        with open(PROBE_CACHE_JSON, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_probe_cache(cache):
+    temp_path = f"{PROBE_CACHE_JSON}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(temp_path, PROBE_CACHE_JSON)
+
+
+def place_file(src, dst, mode=None):
+    """
+    Puts a copy of src at dst and returns (method used, bytes written).
+    Reflinks and hardlinks write no data; any of them failing (other
+    filesystem, unsupported, no permission) falls through to the next.
+    """
+    mode = mode or PLACEMENT_MODE
+    if mode == 'auto':
+        if reflink(src, dst):
+            return 'reflink', 0
+        try:
+            os.link(src, dst)
+            return 'hardlink', 0
+        except OSError:
+            pass
+    return 'copy', kernel_copy(src, dst)
+
+
+def reflink(src, dst):
+    if fcntl is None:
+        return False
+    with open(src, 'rb') as fsrc:
+        try:
+            fdst = open(dst, 'xb')
+        except OSError:
+            return False  # Never touch a file this call did not create
+        try:
+            with fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            os.remove(dst)
+            return False
+    shutil.copymode(src, dst)
+    return True
+
+
+def kernel_copy(src, dst):
+    """
+    Copies src to dst like shutil.copy, but through os.copy_file_range where
+    available so the data never passes through Python. Returns bytes copied.
+    """
+    size = os.path.getsize(src)
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                copied = 0
+                while copied < size:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                    if not sent:
+                        break
+                    copied += sent
+            # Some filesystems (procfs, FUSE, older NFS) report 0 instead of
+            # failing, so a short copy falls back like an unsupported one
+            if copied == size:
+                shutil.copymode(src, dst)
+                return size
+        except OSError:
+            pass  # Not supported between these filesystems
+
+    # shutil.copy itself uses sendfile on Linux and fcopyfile on macOS
+    shutil.copy(src, dst)
+    return size
 
 
 def extract_date_from_filename(filename):
@@ -82,20 +450,5 @@ def extract_date_from_filename(filename):
     return None
 
 
-def get_unique_filename(dest_path):
-    if not os.path.exists(dest_path):
-        return dest_path
-    
-    base_path = os.path.splitext(dest_path)[0]
-    extension = os.path.splitext(dest_path)[1]
-    count = 1
-    
-    while True:
-        new_path = f"{base_path}_{count}{extension}"
-        if not os.path.exists(new_path):
-            return new_path
-        count += 1
-
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+#---- Configs
+INSERT_BATCH_SIZE = 1000  # Conversations written per executemany call
+
+_SCHEMA = (
+    'CREATE TABLE conversations ('
+    'seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, title TEXT, '
+    'create_time REAL, update_time REAL, data TEXT NOT NULL)'
+)
+
+
+class ArchiveWriter:
+    """
+    Writes conversations to an indexed SQLite archive one at a time.
+    Each row keeps the conversation as compact JSON next to its id, title and
+    timestamps; rows keep the order they were written in. Like the master
+    file, the archive is built under a temporary name and only replaces the
+    old one once it is complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.batch = []
+        self.conn = None
+
+    def __enter__(self):
+        self.temp_path = f"{self.path}.tmp"
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.conn = sqlite3.connect(self.temp_path)
+        # A half-written temp file is simply discarded, so skip the journal
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        self.conn.execute(_SCHEMA)
+        return self
+
+    def write(self, conv):
+        self.write_row(archive_row(conv))
+
+    def write_row(self, row):
+        """Writes a row made by archive_row(), e.g. in a worker process."""
+        self.batch.append(row)
+        self.count += 1
+        if len(self.batch) >= INSERT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.conn.executemany(
+            'INSERT INTO conversations (id, title, create_time, update_time, data) VALUES (?, ?, ?, ?, ?)',
+            self.batch
+        )
+        self.batch = []
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+            # Building the index once at the end is cheaper than maintaining it per insert
+            self.conn.execute('CREATE INDEX conversations_create_time ON conversations (create_time)')
+            self.conn.commit()
+        self.conn.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+        return False
+
+
+class ConversationArchive:
+    """
+    Read access to an archive written by ArchiveWriter. Conversations are
+    decoded only when fetched, so looking one up or scanning a date range
+    never parses the rest of the archive.
+    """
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Conversation archive not found: {path}")
+        self.conn = sqlite3.connect(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+
+    def __iter__(self):
+        """Yields conversations in merge order."""
+        for (data,) in self.conn.execute('SELECT data FROM conversations ORDER BY seq'):
+            yield json.loads(data)
+
+    def get(self, conversation_id):
+        """Returns the conversation with this id, or None."""
+        row = self.conn.execute(
+            'SELECT data FROM conversations WHERE id = ?', (conversation_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_created_between(self, start=None, end=None):
+        """
+        Yields conversations with start <= create_time < end (Unix timestamps),
+        oldest first. Conversations without a create_time are left out.
+        """
+        rows = self.conn.execute(
+            'SELECT data FROM conversations WHERE create_time >= ? AND create_time < ? '
+            'ORDER BY create_time, seq',
+            (float('-inf') if start is None else start, float('inf') if end is None else end)
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_archived_conversations(path):
+    """
+    Yields every conversation in an archive in merge order, closing it
+    afterwards. A file that is not a valid archive raises ValueError, as
+    malformed JSON does for iter_conversations.
+    """
+    try:
+        with ConversationArchive(path) as archive:
+            yield from archive
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Invalid conversation archive: {e}") from e
+
+
+def archive_row(conv, data=None):
+    """
+    The (id, title, create_time, update_time, data) row stored for a
+    conversation. Pass data if its compact JSON is already at hand.
+    """
+    return (
+        conversation_key(conv),
+        conv.get('title'),
+        to_timestamp(conv.get('create_time')),
+        to_timestamp(conv.get('update_time')),
+        data or json.dumps(conv, ensure_ascii=False, separators=(',', ':'))
+    )
+
+
+def conversation_key(conv, content_hash=None):
+    """
+    The conversation id, or a hash of its messages for conversations without
+    one. Pass content_hash if it is already known to skip hashing again.
+    """
+    if conv.get('id'):
+        return conv['id']
+    return 'sha1:' + (content_hash or conversation_content_hash(conv)).hex()
+
+
+def conversation_content_hash(conv):
+    """Stable hash of a conversation's messages, independent of key order."""
+    messages = conv.get('mapping', conv.get('messages'))
+    encoded = json.dumps(messages, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).digest()
+
+
+def to_timestamp(value, default=None):
+    """The value as a Unix timestamp, or default if it is missing or not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
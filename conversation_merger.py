@@ -1,11 +1,22 @@
 import os
+import shutil
 import zipfile
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from conversation_stream import iter_conversations
+from conversation_archive import ArchiveWriter, archive_row, conversation_key, conversation_content_hash, to_timestamp
 
 #-----Configs
 EXPORTS_FOLDER = r'C:\Path\To\Your\ChatGPT\Exports'  #export ZIP files
 EXTRACTED_FOLDER = r'C:\Path\To\Your\Extracted\Conversations'  
 MASTER_JSON = r'C:\Path\To\Your\master_conversations.json'  # Output file merged convos
+KEEP_EXTRACTED_COPIES = False  # Also save each export's conversations.json to EXTRACTED_FOLDER
+OUTPUT_FORMAT = 'json'  # 'json' for one JSON array, 'jsonl' for one conversation per line
+COMPACT_JSON = True     # No indentation in 'json' output
+MERGE_WORKERS = None    # Processes parsing exports in parallel (None = one per CPU, 1 = serial)
+MANIFEST_JSON = r'C:\Path\To\Your\merge_manifest.json'  # Exports already merged; None to re-read all each run
+ARCHIVE_DB = r'C:\Path\To\Your\conversations.sqlite'  # Indexed copy for lookups by id or date; None to skip
 
 def main():
     """
@@ -14,97 +25,529 @@ def main():
     """
     
     # Create extraction folder if there's not already one
-    if not os.path.exists(EXTRACTED_FOLDER):
+    if KEEP_EXTRACTED_COPIES and not os.path.exists(EXTRACTED_FOLDER):
         os.makedirs(EXTRACTED_FOLDER)
         print(f"Created extraction folder: {EXTRACTED_FOLDER}")
 
-    all_conversations = []
+    print(f"Processing ChatGPT exports from: {EXPORTS_FOLDER}")
+    if KEEP_EXTRACTED_COPIES:
+        print(f"Extracting to: {EXTRACTED_FOLDER}")
+    print("-" * 50)
+
+    # Sorted so the merge (and which duplicate wins) never depends on listing order
+    zip_files = sorted(file for file in os.listdir(EXPORTS_FOLDER) if file.lower().endswith('.zip'))
+
+    # Without a master file there is nothing to build on, so start from scratch
+    manifest = load_manifest() if MANIFEST_JSON and os.path.exists(MASTER_JSON) else {}
+    rebuild_reason = manifest and manifest_mismatch(manifest)
+    if rebuild_reason:
+        print(f"[REBUILD] {rebuild_reason}, re-reading every export")
+        manifest = {}
+
+    rebuild_reason = merge_exports(zip_files, manifest.get('archives', {}))
+    if rebuild_reason:
+        print(f"[REBUILD] {rebuild_reason}, re-reading every export")
+        merge_exports(zip_files, {})
+
+
+def merge_exports(zip_files, archives):
+    """
+    Merges the exports into the master file. archives holds the manifest
+    entries of the exports already in the master, empty to start from
+    scratch. Only conversations that a removed, changed or earlier-sorting
+    export took part in are decided again, from every export that contains
+    them; the rest keep the copy the master already has, and new exports
+    sorting after all the others are simply folded in. The result is the
+    same file a full rebuild would write. Returns why the previous master
+    cannot be built on, without writing anything, or None once done.
+    """
+    deduplicator = ConversationDeduplicator()
+    conversation_ids = {}  # file -> conversation keys in export order, for the manifest
+    total_conversations = 0
     processed_files = 0
     error_files = 0
 
-    print(f"Processing ChatGPT exports from: {EXPORTS_FOLDER}")
-    print(f"Extracting to: {EXTRACTED_FOLDER}")
-    print("-" * 50)
+    unchanged, changed, new = [], [], []
+    for file in zip_files:
+        entry = archives.get(file)
+        if entry is None:
+            new.append(file)
+        elif is_unchanged_archive(os.path.join(EXPORTS_FOLDER, file), entry):
+            unchanged.append(file)
+            print(f"[UNCHANGED] {file}")
+        else:
+            changed.append(file)
+    removed = sorted(set(archives) - set(zip_files))
 
-    # Process each ZIP file in the exp folder
-    for file in os.listdir(EXPORTS_FOLDER):
-        if file.lower().endswith('.zip'):
-            zip_path = os.path.join(EXPORTS_FOLDER, file)
-            try:
-                conversations = extract_conversations_from_zip(zip_path, file)
-                if conversations:
-                    all_conversations.extend(conversations)
-                    processed_files += 1
-                    print(f"[OK] {file} - {len(conversations)} conversations")
-                else:
-                    print(f"[SKIP] {file} - no conversations found")
-                    
-            except Exception as e:
-                print(f"[ERROR] {file}: {e}")
-                error_files += 1
+    archive_missing = ARCHIVE_DB and not os.path.exists(ARCHIVE_DB)
+    if archives and not (changed or new or removed or archive_missing):
+        print("-" * 50)
+        print(f"No new or changed exports, {MASTER_JSON} is up to date.")
+        return None
+
+    last_merged = max(archives, default=None)
+    appended = [file for file in new if last_merged is None or file > last_merged]
+    inserted = [file for file in new if file not in appended]
+
+    # Conversations whose winner may differ from the one in the master
+    affected = set()
+    for file in removed + changed:
+        affected.update(archives[file]['conversation_ids'])
+    held = {}  # Summaries of changed and inserted exports, until their turn comes
+    for file, summaries, error in iter_parsed_exports(sorted(changed + inserted)):
+        if error is not None:
+            # Like a removed export: its old conversations are already in affected
+            print(f"[ERROR] {file}: {error}")
+            error_files += 1
+            continue
+        held[file] = summaries
+        affected.update(key for key, _, _ in summaries)
+    shared = [file for file in unchanged if not affected.isdisjoint(archives[file]['conversation_ids'])]
+
+    tasks = [(summarize_export, os.path.join(EXPORTS_FOLDER, file), file) for file in shared + appended]
+    if archives:
+        tasks.insert(0, (summarize_master, MASTER_JSON))
+    results = iter_pool_results(tasks)
+
+    if archives:
+        master_summaries, error = next(results)
+        # The master holds the kept copies in file order, which the manifest recorded
+        locations = [(file, position) for file in sorted(archives) for position in archives[file]['kept_positions']]
+        if error is not None or len(master_summaries) != len(locations):
+            results.close()
+            return f"{MASTER_JSON} does not match the manifest"
+        for index, (summary, (file, position)) in enumerate(zip(master_summaries, locations)):
+            if summary[0] not in affected:
+                deduplicator.add_summary(summary, (file, position, index))
+        print(f"[MASTER] {MASTER_JSON} - {len(master_summaries)} conversations")
+        del master_summaries
+
+    # Every copy of an affected conversation is seen again, in export order
+    for file in sorted(shared + list(held)):
+        if file in held:
+            summaries = held.pop(file)
+            conversation_ids[file] = [key for key, _, _ in summaries]
+            total_conversations += len(summaries)
+            processed_files += 1
+            print(f"[OK] {file} - {len(summaries)} conversations")
+        else:
+            summaries, error = next(results)
+            if error is not None:
+                results.close()
+                return f"{file} could not be read again ({error})"
+            print(f"[REREAD] {file} - shares conversations with changed exports")
+        for position, summary in enumerate(summaries):
+            if summary[0] in affected:
+                deduplicator.add_summary(summary, (file, position, None))
+
+    for file in appended:
+        summaries, error = next(results)
+        if error is not None:
+            print(f"[ERROR] {file}: {error}")
+            error_files += 1
+            continue
+        conversation_ids[file] = [key for key, _, _ in summaries]
+        if summaries:
+            total_conversations += len(summaries)
+            for position, summary in enumerate(summaries):
+                deduplicator.add_summary(summary, (file, position, None))
+            processed_files += 1
+            print(f"[OK] {file} - {len(summaries)} conversations")
+        else:
+            print(f"[SKIP] {file} - no conversations found")
 
     print("-" * 50)
     print(f"Processing complete!")
     print(f"Files processed: {processed_files}")
     print(f"Files with errors: {error_files}")
-    print(f"Total conversations before deduplication: {len(all_conversations)}")
+    print(f"Total conversations before deduplication: {total_conversations}")
+    print(f"Unique conversations after deduplication: {len(deduplicator)}")
+    print(f"Older copies replaced by newer versions: {deduplicator.replaced}")
 
-    unique_conversations = remove_duplicates(all_conversations)
-    
-    print(f"Unique conversations after deduplication: {len(unique_conversations)}")
+    # Only the index is in memory; the kept copies are read again from where they are
+    kept = deduplicator.kept()
+    save_master_json(iter_kept_encoded(kept))
+
+    if MANIFEST_JSON:
+        kept_positions = {}
+        for file, position, _ in kept:
+            kept_positions.setdefault(file, []).append(position)
+        new_archives = {}
+        for file in zip_files:
+            if file in conversation_ids:
+                entry = manifest_entry(os.path.join(EXPORTS_FOLDER, file))
+                entry['conversation_ids'] = conversation_ids[file]
+            elif file in unchanged:
+                entry = archives[file]
+            else:
+                continue
+            entry['kept_positions'] = kept_positions.get(file, [])
+            new_archives[file] = entry
+        save_manifest(new_archives)
+    return None
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_JSON, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(archives):
+    temp_path = f"{MANIFEST_JSON}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({**manifest_settings(), 'archives': archives}, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, MANIFEST_JSON)
+
+
+def manifest_settings():
+    """The settings the master was written with; a change means it has to be rebuilt."""
+    return {'master': MASTER_JSON, 'output_format': OUTPUT_FORMAT, 'compact_json': COMPACT_JSON}
+
+
+def manifest_mismatch(manifest):
+    """Returns why the master described by a manifest cannot be built on, or None if it can."""
+    for name, value in manifest_settings().items():
+        if manifest.get(name) != value:
+            return f"{name} differs from the last run"
+    archives = manifest.get('archives')
+    if not isinstance(archives, dict) or not all(
+        isinstance(entry, dict) and 'conversation_ids' in entry and 'kept_positions' in entry
+        for entry in archives.values()
+    ):
+        return "the manifest has no per-export conversation ids"
+    return None
+
+
+def manifest_entry(zip_path):
+    """Records what identifies an export: size, mtime and the CRC of its conversations.json."""
+    stat = os.stat(zip_path)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'crc': conversations_crc(zip_path)
+    }
+
+
+def is_unchanged_archive(zip_path, entry):
+    """
+    Size and mtime matching means unchanged without opening the file. If only
+    the mtime moved, the CRC in the ZIP central directory decides.
+    """
+    try:
+        stat = os.stat(zip_path)
+    except OSError:
+        return False
+    if stat.st_size != entry.get('size'):
+        return False
+    if stat.st_mtime != entry.get('mtime'):
+        try:
+            if conversations_crc(zip_path) != entry.get('crc'):
+                return False
+        except (OSError, zipfile.BadZipFile):
+            return False
+        entry['mtime'] = stat.st_mtime
+    return True
+
+
+def conversations_crc(zip_path):
+    # Only reads the central directory, not the compressed data
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        try:
+            return z.getinfo('conversations.json').CRC
+        except KeyError:
+            return None
+
+
+def iter_parsed_exports(zip_files, workers=MERGE_WORKERS):
+    """
+    Yields (file, summaries, error) for each export, in the order given, with
+    one conversation_summary() per conversation. Exports are decompressed,
+    parsed and hashed in the process pool; only the summaries travel back,
+    never the conversations themselves.
+    """
+    tasks = [(summarize_export, os.path.join(EXPORTS_FOLDER, file), file) for file in zip_files]
+    for file, (summaries, error) in zip(zip_files, iter_pool_results(tasks, workers)):
+        yield file, summaries, error
+
+
+def iter_pool_results(tasks, workers=MERGE_WORKERS):
+    """
+    Runs each (function, *args) task and yields (result, error) in the order
+    given. With more than one worker the tasks run in a process pool, keeping
+    at most two per worker in flight so finished results never pile up in
+    memory. The pool starts on the first tasks as soon as the generator is
+    first advanced, so the caller can work alongside it.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        for function, *args in tasks:
+            try:
+                yield function(*args), None
+            except Exception as e:
+                yield None, e
+        return
+
+    remaining = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit_next():
+            task = next(remaining, None)
+            if task is not None:
+                pending.append(pool.submit(*task))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while pending:
+            future = pending.popleft()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            submit_next()
+            yield result, error
 
-    save_master_json(unique_conversations)
 
+def summarize_master(path):
+    """Returns a conversation_summary() for each conversation in the master, in order."""
+    return [conversation_summary(conv) for conv in iter_conversations(path)]
 
-def extract_conversations_from_zip(zip_path, filename):
+
+def summarize_export(zip_path, filename):
+    """
+    Returns a conversation_summary() for each conversation in an export,
+    parsed straight from the ZIP member stream one conversation at a time.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        if 'conversations.json' in z.namelist() and KEEP_EXTRACTED_COPIES:
+            archive_extracted_copy(z, filename)
+    return [conversation_summary(conv) for conv in iter_export_conversations(zip_path)]
+
+
+def iter_export_conversations(zip_path):
+    """
+    Yields the conversations in an export's conversations.json, read from the
+    ZIP member stream without writing it to disk first.
+    """
     with zipfile.ZipFile(zip_path, 'r') as z:
         if 'conversations.json' not in z.namelist():
-            return []
-        
-        z.extract('conversations.json', EXTRACTED_FOLDER)
-        extracted_path = os.path.join(EXTRACTED_FOLDER, 'conversations.json')
+            return
         
-        with open(extracted_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Handle different ds
-        conversations = []
-        if isinstance(data, list):
-            conversations = data
-        elif isinstance(data, dict):
-            conversations = [data]
-
-        # Rename the extr file to avoid overwriting
-        archive_name = os.path.splitext(filename)[0]
-        archived_path = os.path.join(EXTRACTED_FOLDER, f'{archive_name}_conversations.json')
-        os.rename(extracted_path, archived_path)
-        
-        return conversations
+        # Handles both a list of conversations and a single conversation object
+        with z.open('conversations.json') as member:
+            yield from iter_conversations(member)
 
 
-def remove_duplicates(conversations):
-    unique_conversations = []
-    seen_ids = set()
-    
-    for conv in conversations:
-        #different fields to identify unique convos
-        conv_id = conv.get('id') or conv.get('title') or conv.get('create_time')
-        
-        if conv_id and conv_id not in seen_ids:
-            unique_conversations.append(conv)
-            seen_ids.add(conv_id)
-        elif not conv_id:
-            # If no id field found, include it anyway
-            unique_conversations.append(conv)
+def iter_kept_encoded(kept, workers=MERGE_WORKERS):
+    """
+    Yields (master text, archive row) for the winning (file, position,
+    master index) locations, in that order. Winners the previous master
+    already holds are read from it here, one long stream; the rest are read
+    again from their exports and encoded in the process pool, so this
+    process only writes strings.
+    """
+    by_file = {}
+    for file, position, master_index in kept:
+        by_file.setdefault(file, []).append((position, master_index))
+    from_exports = {}
+    for file, winners in by_file.items():
+        positions = {position for position, master_index in winners if master_index is None}
+        if positions:
+            from_exports[file] = positions
+
+    settings = (OUTPUT_FORMAT, COMPACT_JSON, bool(ARCHIVE_DB))
+    tasks = [
+        (encode_kept_export, os.path.join(EXPORTS_FOLDER, file), positions, *settings)
+        for file, positions in from_exports.items()
+    ]
+    results = iter_pool_results(tasks, workers)
+    master_indexes = {master_index for _, _, master_index in kept if master_index is not None}
+    master = iter_encoded(iter_conversations(MASTER_JSON), master_indexes, *settings) if master_indexes else None
+
+    for file, winners in by_file.items():
+        encoded = ()
+        if file in from_exports:
+            encoded, error = next(results)
+            if error is not None:
+                raise error
+        encoded = iter(encoded)
+        for _, master_index in winners:
+            yield next(master) if master_index is not None else next(encoded)
+
+
+def encode_kept_export(zip_path, positions, output_format, compact, archive):
+    """Runs in a worker: what iter_encoded() yields for one export, as a list."""
+    return list(iter_encoded(iter_export_conversations(zip_path), positions, output_format, compact, archive))
+
+
+def iter_encoded(conversations, positions, output_format, compact, archive):
+    """
+    Yields (master text, archive row or None) for the conversations at the
+    given positions.
+    """
+    for position, conv in enumerate(conversations):
+        if position in positions:
+            text = encode_conversation(conv, output_format, compact)
+            data = text if output_format == 'jsonl' or compact else None
+            yield text, archive_row(conv, data) if archive else None
+
+
+def archive_extracted_copy(z, filename):
+    # Written straight under its final per-export name, so concurrent runs
+    # never meet at a shared conversations.json temp file
+    archive_name = os.path.splitext(filename)[0]
+    archived_path = os.path.join(EXTRACTED_FOLDER, f'{archive_name}_conversations.json')
     
-    return unique_conversations
+    with z.open('conversations.json') as member, open(archived_path, 'wb') as out:
+        shutil.copyfileobj(member, out, 1 << 20)
+
+
+def remove_duplicates(conversations):
+    conversations = list(conversations)
+    deduplicator = ConversationDeduplicator()
+    for position, conv in enumerate(conversations):
+        deduplicator.add(conv, position)
+    kept = set(deduplicator.kept())
+    return [conv for position, conv in enumerate(conversations) if position in kept]
+
+
+class ConversationDeduplicator:
+    """
+    Decides which copy of each conversation to keep, preferring the most
+    complete version. Conversations are keyed by id, or by a hash of their
+    messages when they have none, so identical untitled chats collapse too.
+    When a key repeats, the copy with the later update_time wins, then the
+    one with more messages; exact copies keep the first one seen.
+    Only key -> (rank, content hash, location) is held, never the
+    conversations. A location says where the copy was found, e.g. a
+    (file, position) pair; the kept copies are read back in location order
+    afterwards, so a replaced conversation moves to where its newer copy
+    appears.
+    """
+
+    def __init__(self):
+        self.index = {}  # key -> (rank, content hash, location)
+        self.replaced = 0
+
+    def add(self, conv, location):
+        """Adds a conversation found at location; returns True if it introduced a new key."""
+        return self.add_summary(conversation_summary(conv), location)
+
+    def add_summary(self, summary, location):
+        """Like add(), for a conversation_summary() computed elsewhere."""
+        key, rank, content_hash = summary
+        entry = self.index.get(key)
+        if entry is None:
+            self.index[key] = (rank, content_hash, location)
+            return True
+
+        old_rank, old_hash, _ = entry
+        if content_hash != old_hash and rank > old_rank:
+            self.index[key] = (rank, content_hash, location)
+            self.replaced += 1
+        return False
+
+    def kept(self):
+        """Returns the locations of the copies that won, sorted."""
+        return sorted(location for _, _, location in self.index.values())
+
+    def __len__(self):
+        return len(self.index)
+
+
+def conversation_summary(conv):
+    """(key, rank, content hash): all the deduplicator needs to know about a conversation."""
+    content_hash = conversation_content_hash(conv)
+    return conversation_key(conv, content_hash), conversation_rank(conv), content_hash
+
 
+def conversation_rank(conv):
+    messages = conv.get('mapping', conv.get('messages')) or ()
+    # Missing timestamps rank as 0.0 so they still compare against real ones
+    return (to_timestamp(conv.get('update_time') or conv.get('create_time'), 0.0), len(messages))
 
-def save_master_json(conversations):
-    with open(MASTER_JSON, 'w', encoding='utf-8') as f:
-        json.dump(conversations, f, indent=2, ensure_ascii=False)
+
+def save_master_json(encoded):
+    """Writes (master text, archive row) pairs as made by iter_encoded()."""
+    if not ARCHIVE_DB:
+        with MasterWriter(MASTER_JSON, OUTPUT_FORMAT, COMPACT_JSON) as writer:
+            for text, _ in encoded:
+                writer.write_encoded(text)
+        print(f"Master conversation archive saved to: {MASTER_JSON}")
+        return
+
+    # Both files are filled in the same pass over the conversations
+    with MasterWriter(MASTER_JSON, OUTPUT_FORMAT, COMPACT_JSON) as writer, ArchiveWriter(ARCHIVE_DB) as archive:
+        for text, row in encoded:
+            writer.write_encoded(text)
+            archive.write_row(row)
     
     print(f"Master conversation archive saved to: {MASTER_JSON}")
+    print(f"Indexed archive saved to: {ARCHIVE_DB}")
+
+
+def encode_conversation(conv, output_format='json', compact=True):
+    """One conversation as MasterWriter writes it: compact, or indented to sit inside the array."""
+    if output_format == 'jsonl' or compact:
+        return json.dumps(conv, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(conv, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+
+
+class MasterWriter:
+    """
+    Writes conversations to the master file one at a time.
+    'json' output is a single array (compact, or indented like json.dump with
+    indent=2); 'jsonl' output is one compact conversation per line. The file
+    is written under a temporary name and only replaces the old master once
+    it is complete.
+    """
+
+    def __init__(self, path, output_format='json', compact=True):
+        if output_format not in ('json', 'jsonl'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.path = path
+        self.output_format = output_format
+        self.compact = compact
+        self.count = 0
+        self.out = None
+
+    def __enter__(self):
+        self.temp_path = f"{self.path}.tmp"
+        self.out = open(self.temp_path, 'w', encoding='utf-8', buffering=1 << 20)
+        if self.output_format == 'json':
+            self.out.write('[')
+        return self
+
+    def write(self, conv):
+        self.write_encoded(encode_conversation(conv, self.output_format, self.compact))
+
+    def write_encoded(self, text):
+        """Writes a conversation already encoded by encode_conversation() with this writer's settings."""
+        if self.output_format == 'jsonl':
+            self.out.write(text)
+            self.out.write('\n')
+        elif self.compact:
+            self.out.write(',' if self.count else '')
+            self.out.write(text)
+        else:
+            self.out.write(',\n  ' if self.count else '\n  ')
+            self.out.write(text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.output_format == 'json':
+            self.out.write('\n]' if self.count and not self.compact else ']')
+        self.out.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+        return False
 
 
 if __name__ == "__main__":
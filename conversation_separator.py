@@ -1,11 +1,23 @@
+import hashlib
 import json
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from conversation_stream import iter_conversations
+from conversation_archive import iter_archived_conversations, conversation_key
+from filename_registry import FilenameRegistry
+from conversation_tree import extract_messages
 
 #---- Configs
 MASTER_JSON = r'C:\Path\To\Your\master_conversations.json'  # I: merged convos file
 OUTPUT_DIR = r'C:\Path\To\Your\Separated\Conversations'     # O: folder for individual files
+ARCHIVE_DB = None  # Read the merger's indexed archive instead of MASTER_JSON when set
+ALL_BRANCHES = False  # Include abandoned regenerations and edits, not just the active branch
+EXPORT_WORKERS = None     # Processes writing files in parallel (None = one per CPU, 1 = serial)
+EXPORT_BATCH_SIZE = 500   # Conversations per worker task, and per progress line
+STATE_JSON = r'C:\Path\To\Your\separator_state.json'  # Files written last run; None to rewrite every file
 
 def main():
     """
@@ -13,8 +25,9 @@ def main():
     Each conversation becomes a separate file organized by date and title.
     """
 
-    if not os.path.exists(MASTER_JSON):
-        print(f"Error: Master conversations file not found at {MASTER_JSON}")
+    source = ARCHIVE_DB or MASTER_JSON
+    if not os.path.exists(source):
+        print(f"Error: Master conversations file not found at {source}")
         print("Please run the conversation merger script first.")
         return
     
@@ -22,77 +35,237 @@ def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     print(f"Output directory: {OUTPUT_DIR}")
     
-    # Load convos
-    try:
-        with open(MASTER_JSON, 'r', encoding='utf-8') as f:
-            conversations = json.load(f)
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in {MASTER_JSON}")
-        return
-    
-    print(f"Processing {len(conversations)} conversations...")
+    # Convos are streamed one at a time, so memory stays flat for any file size
+    print("Processing conversations...")
     print("-" * 50)
     
     # Process each convo
     successful_exports = 0
     failed_exports = 0
+    read_error = False
+    state = ExportState(STATE_JSON, FilenameRegistry(OUTPUT_DIR))
+
+    # One timestamp for the whole run, so serial and parallel output match byte for byte
+    exported_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    for idx, conv in enumerate(conversations, 1):
-        try:
-            export_conversation(conv, idx)
-            successful_exports += 1
-            
-            # Progress indicator
-            if idx % 10 == 0:
-                print(f"Processed {idx}/{len(conversations)} conversations...")
+    try:
+        for results in iter_export_batches(iter_source_conversations(), exported_at, state):
+            for idx, error in results:
+                state.record(idx, error)
+                if error is None:
+                    successful_exports += 1
+                else:
+                    print(f"Error processing conversation {idx}: {error}")
+                    failed_exports += 1
                 
-        except Exception as e:
-            print(f"Error processing conversation {idx}: {e}")
-            failed_exports += 1
+            # Progress indicator
+            print(f"Processed {successful_exports + failed_exports} conversations...")
+    except ValueError as e:
+        print(f"Error: Could not read {source} ({e})")
+        read_error = True
+
+    # Only a complete pass shows which files no conversation owns any more
+    removed_files = 0 if read_error else state.remove_stale_files()
+    state.save(keep_previous=read_error)
     
     print("-" * 50)
     print("Processing complete!")
     print(f"Successfully exported: {successful_exports}")
+    print(f"Unchanged since last run: {state.unchanged}")
     print(f"Failed exports: {failed_exports}")
+    print(f"Removed files of deleted or renamed conversations: {removed_files}")
     print(f"Files saved to: {OUTPUT_DIR}")
 
 
-def export_conversation(conv, idx):
+def iter_export_batches(conversations, exported_at, state, workers=EXPORT_WORKERS):
+    """
+    Yields [(idx, error or None)] for each batch of conversations, in order.
+    Filenames are all assigned here, in the one coordinating process, so
+    workers never race for a name; with more than one worker the batches are
+    formatted and written in a process pool, at most two per worker in flight.
+    """
+    batches = iter_assigned_batches(conversations, state)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for batch in batches:
+            yield export_batch(batch, exported_at)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit_next():
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(pool.submit(export_batch, batch, exported_at))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while pending:
+            results = pending.popleft().result()
+            submit_next()
+            yield results
+
+
+def iter_assigned_batches(conversations, state, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Groups (idx, conv, filepath, error) into batches, giving each conversation
+    its unique file. Conversations whose file is still current are left out.
+    """
+    batch = []
+    for idx, conv in enumerate(conversations, 1):
+        try:
+            filepath = state.assign(conv, idx, conversation_filename(conv, idx))
+            if filepath is None:
+                continue
+            batch.append((idx, conv, filepath, None))
+        except Exception as e:
+            batch.append((idx, None, None, str(e)))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_batch(batch, exported_at):
+    results = []
+    for idx, conv, filepath, error in batch:
+        if error is None:
+            try:
+                export_conversation(conv, idx, filepath, exported_at)
+            except Exception as e:
+                error = str(e)
+        results.append((idx, error))
+    return results
+
+
+def conversation_filename(conv, idx):
 
     # Extract metadata
     title = conv.get('title', f'Conversation {idx}')
-    create_time = conv.get('create_time', '')
-    date_str = format_timestamp_for_filename(create_time)
+    date_str = format_timestamp_for_filename(conv.get('create_time', ''))
     
     safe_title = sanitize_filename(title)
-    filename = f"{date_str}_{safe_title}.md"
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    
-    # Handle duplicates
-    filepath = get_unique_filepath(filepath)
+    return f"{date_str}_{safe_title}.md"
+
+
+class ExportState:
+    """
+    Sidecar record of the last run: conversation id -> output file, the
+    filename it asked for, a hash of everything the file is rendered from and
+    update_time. Lets a run skip conversations whose file is still current
+    and remove files whose conversation was deleted or retitled. With no
+    state path every conversation is exported and nothing is removed.
+    """
+
+    def __init__(self, path, registry):
+        self.path = path
+        self.registry = registry
+        self.previous = self.load() if path else {}
+        self.current = {}
+        self.pending = {}  # idx -> (key, entry) for files handed out to be written
+        self.unchanged = 0
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('conversations', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def assign(self, conv, idx, filename):
+        """Returns the path to write conv to, or None if last run's file is still current."""
+        key = conversation_key(conv)
+        content_hash = rendered_content_hash(conv)
+        old = self.previous.get(key)
+        # The registry's single listing doubles as the check that the old file is still there
+        old_exists = old is not None and old['file'] in self.registry
+
+        if old_exists and old['hash'] == content_hash:
+            self.current[key] = old
+            self.unchanged += 1
+            return None
+
+        if old_exists and old['name'] == filename:
+            # Same title and date: rewrite the file in place instead of adding a suffix
+            filepath = os.path.join(self.registry.folder, old['file'])
+        else:
+            # Handle duplicates, including files assigned but not yet written
+            filepath = self.registry.claim(filename)
+
+        self.pending[idx] = (key, {
+            'file': os.path.basename(filepath),
+            'name': filename,
+            'hash': content_hash,
+            'update_time': conv.get('update_time')
+        })
+        return filepath
+
+    def record(self, idx, error):
+        key, entry = self.pending.pop(idx, (None, None))
+        if entry is None:
+            return
+        if error is None:
+            self.current[key] = entry
+        elif key in self.previous:
+            # Keep the old file; its hash no longer matches, so the next run retries
+            self.current.setdefault(key, self.previous[key])
+
+    def remove_stale_files(self):
+        """Deletes last run's files that no conversation owns now; returns how many."""
+        owned = {os.path.normcase(entry['file']) for entry in self.current.values()}
+        removed = 0
+        for entry in self.previous.values():
+            if os.path.normcase(entry['file']) not in owned and entry['file'] in self.registry:
+                try:
+                    os.remove(os.path.join(self.registry.folder, entry['file']))
+                    removed += 1
+                except OSError as e:
+                    print(f"Could not remove {entry['file']}: {e}")
+        return removed
+
+    def save(self, keep_previous=False):
+        if not self.path:
+            return
+        conversations = {**self.previous, **self.current} if keep_previous else self.current
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'output_dir': OUTPUT_DIR, 'conversations': conversations}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+def rendered_content_hash(conv):
+    """Hash of the conversation and the options it is rendered with, independent of key order."""
+    encoded = json.dumps([conv, ALL_BRANCHES], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def export_conversation(conv, idx, filepath, exported_at):
+
+    title = conv.get('title', f'Conversation {idx}')
+    create_time = conv.get('create_time', '')
     
     # Write convo to file
     with open(filepath, 'w', encoding='utf-8') as out:
-        write_conversation_header(out, title, create_time)
+        write_conversation_header(out, title, create_time, exported_at)
         write_conversation_messages(out, conv)
-    
-    print(f"[OK] {os.path.basename(filepath)}")
 
 
-def write_conversation_header(out, title, create_time):
+def write_conversation_header(out, title, create_time, exported_at):
 
     formatted_time = format_timestamp_for_display(create_time)
     
     out.write(f"# {title}\n\n")
     out.write(f"**Created:** {formatted_time}\n")
-    out.write(f"**Exported:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    out.write(f"**Exported:** {exported_at}\n\n")
     out.write("---\n\n")
 
 
 def write_conversation_messages(out, conv):
 
-    messages = conv.get('mapping', conv.get('messages', {}))
-    message_list = extract_messages(messages)
+    message_list = extract_messages(conv, ALL_BRANCHES)
     
     if not message_list:
         out.write("*No messages found in this conversation.*\n\n")
@@ -104,34 +277,11 @@ def write_conversation_messages(out, conv):
         out.write("---\n\n")
 
 
-def extract_messages(messages):
-
-    message_list = []
-    
-    if isinstance(messages, dict):
-        for m in messages.values():
-            if m is None:
-                continue
-            message_obj = m.get('message')
-            if not isinstance(message_obj, dict):
-                continue
-            content = message_obj.get('content', {})
-            parts = content.get('parts', [])
-            role = message_obj.get('author', {}).get('role', 'unknown')
-            for part in parts:
-                if part and part.strip():
-                    message_list.append((role, part))
-                    
-    elif isinstance(messages, list):
-        for m in messages:
-            role = m.get('role', 'unknown')
-            content = m.get('content', '')
-            if isinstance(content, dict):
-                content = content.get('parts', [''])[0]
-            if content and content.strip():
-                message_list.append((role, content))
-    
-    return message_list
+def iter_source_conversations():
+    # The archive decodes one row at a time, so both sources stream
+    if ARCHIVE_DB:
+        return iter_archived_conversations(ARCHIVE_DB)
+    return iter_conversations(MASTER_JSON)
 
 
 def format_timestamp_for_filename(timestamp):
@@ -164,20 +314,5 @@ def sanitize_filename(filename):
     return sanitized
 
 
-def get_unique_filepath(filepath):
-    if not os.path.exists(filepath):
-        return filepath
-    
-    base_path = os.path.splitext(filepath)[0]
-    extension = os.path.splitext(filepath)[1]
-    count = 1
-    
-    while True:
-        new_path = f"{base_path}_{count}{extension}"
-        if not os.path.exists(new_path):
-            return new_path
-        count += 1
-
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,168 @@
+import codecs
+import io
+import json
+import os
+import re
+
+try:
+    import ijson  # Optional C-accelerated backend, used for plain arrays when installed
+except ImportError:
+    ijson = None
+
+#---- Configs
+CHUNK_SIZE = 1 << 20  # Characters read from the source per refill
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# A decode error this close to the end of the buffer may just be a token cut
+# off by the chunk boundary (-Infinity, a \uXXXX escape, a number's exponent)
+_TRUNCATION_WINDOW = 16
+
+
+def iter_conversations(source, chunk_size=CHUNK_SIZE):
+    """
+    Yields conversation objects one at a time from a conversations export.
+    source can be a path or an open file object (text or binary, including a
+    zipfile member). Handles a top-level JSON array, a single JSON object and
+    JSON Lines, while only holding about one conversation in memory.
+    Raises ValueError (json.JSONDecodeError for the built-in parser) on
+    malformed input, possibly after some conversations were already yielded.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_conversations(f, chunk_size)
+        return
+
+    if ijson is not None and not isinstance(source, io.TextIOBase):
+        first = source.read(chunk_size)
+        if first.startswith(codecs.BOM_UTF8):
+            first = first[len(codecs.BOM_UTF8):]
+        source = _PrefixedBytes(first, source)
+        if first.lstrip(b' \t\r\n').startswith(b'['):
+            try:
+                yield from ijson.items(source, 'item', use_float=True)
+            except ijson.JSONError as e:
+                raise ValueError(f"Invalid JSON: {e}") from e
+            return
+
+    reader = _TextReader(source)
+    yield from _iter_json_values(reader, reader.read(chunk_size), chunk_size)
+
+
+def _iter_json_values(reader, buffer, chunk_size):
+    decoder = json.JSONDecoder()
+    pos = _WHITESPACE.match(buffer, 0).end()
+    eof = not buffer
+    in_array = False
+
+    def refill(buffer, pos, min_size=0):
+        # Drop what has been consumed, then read at least as much as is still
+        # buffered so a huge object costs O(size) re-parses, not O(size^2)
+        chunk = reader.read(max(chunk_size, min_size))
+        return buffer[pos:] + chunk, 0, not chunk
+
+    while pos >= len(buffer) and not eof:
+        buffer, pos, eof = refill(buffer, pos)
+        pos = _WHITESPACE.match(buffer, pos).end()
+
+    if buffer[pos:pos + 1] == '[':
+        in_array = True
+        pos += 1
+    after_comma = False
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        while pos >= len(buffer) and not eof:
+            buffer, pos, eof = refill(buffer, pos)
+            pos = _WHITESPACE.match(buffer, pos).end()
+
+        if pos >= len(buffer):
+            if in_array:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            return
+        if in_array and buffer[pos] == ']':
+            if after_comma:
+                raise json.JSONDecodeError("Expecting value", buffer, pos)
+            _check_trailing(reader, buffer[pos + 1:], chunk_size)
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            complete = end < len(buffer) or eof
+            if complete and not eof and isinstance(value, (int, float)) and len(buffer) - end <= _TRUNCATION_WINDOW:
+                # A bare number cut at the boundary ("-2." of "-2.5") still parses
+                complete = False
+        except json.JSONDecodeError as e:
+            # Only an error at the end of what is buffered can be fixed by
+            # reading more; anything earlier is a real syntax error
+            if eof or not _may_be_truncated(e, buffer):
+                raise
+            complete = False
+
+        if not complete:
+            buffer, pos, eof = refill(buffer, pos, len(buffer) - pos)
+            continue
+
+        yield value
+        pos = _WHITESPACE.match(buffer, end).end()
+
+        if in_array:
+            while pos >= len(buffer) and not eof:
+                buffer, pos, eof = refill(buffer, pos)
+                pos = _WHITESPACE.match(buffer, pos).end()
+            after_comma = buffer[pos:pos + 1] == ','
+            if after_comma:
+                pos += 1
+            elif buffer[pos:pos + 1] != ']':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def _may_be_truncated(error, buffer):
+    return (error.msg.startswith('Unterminated string')
+            or len(buffer) - error.pos <= _TRUNCATION_WINDOW)
+
+
+def _check_trailing(reader, rest, chunk_size):
+    """Raises if anything but whitespace follows the closing bracket of the array."""
+    while True:
+        extra = _WHITESPACE.match(rest).end()
+        if extra < len(rest):
+            raise json.JSONDecodeError("Extra data", rest, extra)
+        rest = reader.read(chunk_size)
+        if not rest:
+            return
+
+
+class _TextReader:
+    """Reads str chunks from a text or binary stream, decoding UTF-8 incrementally."""
+
+    def __init__(self, source):
+        self.source = source
+        self.binary = not isinstance(source, io.TextIOBase)
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')() if self.binary else None
+
+    def read(self, size):
+        if not self.binary:
+            return self.source.read(size)
+        # Only return '' at the real end, not when a read stops mid-character
+        while True:
+            data = self.source.read(size)
+            text = self.decoder.decode(data, final=not data)
+            if text or not data:
+                return text
+
+
+class _PrefixedBytes:
+    """File-like object that replays already-read bytes before the rest of a stream."""
+
+    def __init__(self, prefix, source):
+        self.prefix = prefix
+        self.source = source
+
+    def read(self, size=-1):
+        if self.prefix and size != 0:
+            data, self.prefix = self.prefix, b''
+            return data
+        return self.source.read(size)
@@ -0,0 +1,91 @@
+def extract_messages(conv, all_branches=False):
+    """
+    Returns [(role, text)] for a conversation in reading order.
+    In the mapping format only the active branch is kept: the path from
+    current_node back up to the root, so regenerated and edited replies that
+    were abandoned are left out. all_branches emits every branch instead,
+    depth first in the order the children are listed. The older flat
+    messages list is read as is.
+    """
+    messages = conv.get('mapping', conv.get('messages', {}))
+    message_list = []
+
+    if isinstance(messages, dict):
+        if all_branches:
+            nodes = iter_all_branches(messages)
+        else:
+            nodes = iter_active_branch(messages, conv.get('current_node'))
+        for node in nodes:
+            message_list.extend(message_parts(node))
+
+    elif isinstance(messages, list):
+        for message in messages:
+            role = message.get('role', 'unknown')
+            content = message.get('content', '')
+            if isinstance(content, dict):
+                content = content.get('parts', [''])[0]
+            if isinstance(content, str) and content.strip():
+                message_list.append((role, content))
+
+    return message_list
+
+
+def iter_active_branch(mapping, current_node):
+    """
+    Yields the nodes from the root down to current_node, walking parent
+    links once, so the cost is the length of that path rather than the size
+    of the tree. Without a usable current_node every branch is yielded.
+    """
+    if current_node not in mapping:
+        yield from iter_all_branches(mapping)
+        return
+
+    path = []
+    seen = set()
+    node_id = current_node
+    while node_id in mapping and node_id not in seen:
+        node = mapping[node_id]
+        if not isinstance(node, dict):
+            break
+        seen.add(node_id)
+        path.append(node)
+        node_id = node.get('parent')
+
+    yield from reversed(path)
+
+
+def iter_all_branches(mapping):
+    """
+    Yields every node reachable from a root (a node whose parent is not in
+    the mapping), depth first. Iterative, so trees far deeper than the
+    recursion limit are fine; mappings without parent/children links come
+    out in dict order.
+    """
+    roots = [
+        node_id for node_id, node in mapping.items()
+        if isinstance(node, dict) and node.get('parent') not in mapping
+    ]
+    stack = roots[::-1]
+    seen = set()
+
+    while stack:
+        node_id = stack.pop()
+        node = mapping.get(node_id)
+        if node_id in seen or not isinstance(node, dict):
+            continue
+        seen.add(node_id)
+        yield node
+        stack.extend(reversed(node.get('children') or ()))
+
+
+def message_parts(node):
+    """Returns [(role, text)] for the non-empty text parts of a mapping node."""
+    message = node.get('message')
+    if not isinstance(message, dict):
+        return []
+    content = message.get('content') or {}
+    role = (message.get('author') or {}).get('role', 'unknown')
+    return [
+        (role, part) for part in content.get('parts') or ()
+        if isinstance(part, str) and part.strip()
+    ]
@@ -0,0 +1,36 @@
+import os
+
+
+class FilenameRegistry:
+    """
+    Hands out unique filenames in one folder without touching the disk per
+    name. The folder is listed once up front; after that a colliding name
+    gets the next free _1, _2, ... suffix from a per-name counter, so
+    thousands of files with the same title cost O(1) each instead of one
+    os.path.exists call per suffix tried. Names compare with normcase, as
+    the filesystem would on Windows. Only valid while nothing else creates
+    files in the folder.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.taken = set()
+        self.next_suffix = {}
+        if os.path.isdir(folder):
+            self.taken.update(os.path.normcase(name) for name in os.listdir(folder))
+
+    def claim(self, filename):
+        """Reserves filename, or its first free suffixed variant, and returns the full path."""
+        key = os.path.normcase(filename)
+        if key in self.taken:
+            base, extension = os.path.splitext(filename)
+            count = self.next_suffix.get(key, 1)
+            while os.path.normcase(f"{base}_{count}{extension}") in self.taken:
+                count += 1
+            self.next_suffix[key] = count + 1
+            filename = f"{base}_{count}{extension}"
+        self.taken.add(os.path.normcase(filename))
+        return os.path.join(self.folder, filename)
+
+    def __contains__(self, filename):
+        return os.path.normcase(filename) in self.taken
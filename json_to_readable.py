@@ -1,9 +1,21 @@
-import json
+import os
+import re
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import quote, unquote
+from conversation_stream import iter_conversations
+from conversation_archive import iter_archived_conversations
+from conversation_tree import extract_messages
 
 #----Configs
 MASTER_JSON = r'C:\Path\To\Your\master_conversations.json'  # I: merged convo file
 OUTPUT_MD = r'C:\Path\To\Your\conversations_readable.md'   # O: readable md file
+ARCHIVE_DB = None  # Read the merger's indexed archive instead of MASTER_JSON when set
+ALL_BRANCHES = False  # Include abandoned regenerations and edits, not just the active branch
+SHARD_BY = None     # None for one file; 'size', 'count' or 'month' to split it, with OUTPUT_MD as an index
+SHARD_MAX_BYTES = 50 * 1024 * 1024  # Roll over to a new file past this size ('size')
+SHARD_MAX_CONVERSATIONS = 1000      # Conversations per file ('count')
+MAX_OPEN_SHARDS = 32                # Files kept open at once when sharding by month
 
 def main():
     """
@@ -11,39 +23,230 @@ def main():
     Creates a single markdown file with all conversations formatted for easy reading.
     """
     
-    try:
-        with open(MASTER_JSON, 'r', encoding='utf-8') as f:
-            conversations = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Could not find master conversations file at {MASTER_JSON}")
+    source = ARCHIVE_DB or MASTER_JSON
+    if not os.path.exists(source):
+        print(f"Error: Could not find master conversations file at {source}")
         print("Please run the conversation merger script first.")
         return
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in {MASTER_JSON}")
-        return
 
-    print(f"Converting {len(conversations)} conversations to readable format...")
+    print("Converting conversations to readable format...")
 
-    with open(OUTPUT_MD, 'w', encoding='utf-8') as out:
-        write_header(out, len(conversations))
+    # Convos are streamed one at a time, so the total is only known at the end
+    total_conversations = 0
+    with ReadableWriter(OUTPUT_MD, SHARD_BY) as writer:
+        try:
+            for idx, conv in enumerate(iter_source_conversations(), 1):
+                writer.write(conv, idx)
+                total_conversations = idx
+                
+                # Progress indicator 
+                if idx % 10 == 0:
+                    print(f"Processed {idx} conversations...")
+        except ValueError as e:
+            print(f"Error: Could not read {source} ({e})")
+            return
         
-        for idx, conv in enumerate(conversations, 1):
-            write_conversation(out, conv, idx)
-            
-            # Progress indicator 
-            if idx % 10 == 0:
-                print(f"Processed {idx}/{len(conversations)} conversations...")
+        writer.finish(total_conversations)
+
+    if SHARD_BY:
+        print(f"Conversion complete! {total_conversations} conversations saved to "
+              f"{len(writer.shards)} files, indexed in: {OUTPUT_MD}")
+    else:
+        print(f"Conversion complete! {total_conversations} conversations saved to: {OUTPUT_MD}")
+    if writer.removed:
+        print(f"Removed {writer.removed} shard files left over from an earlier run")
+
+
+INDEX_TITLE = "# ChatGPT Conversations - Index\n"
+INDEX_LINK = re.compile(r'\| \[.*\]\(([^)]*)\) \|')
+
+
+class ReadableWriter:
+    """
+    Writes the readable Markdown, either to a single file or split into
+    shards next to it: a new file past SHARD_MAX_BYTES or
+    SHARD_MAX_CONVERSATIONS, or one file per month of create_time. When
+    sharded, the output path holds an index linking the shards. Only a few
+    shard files are open at a time and nothing but per-shard counters is
+    kept, so memory stays flat for any number of conversations.
+    """
+
+    def __init__(self, path, shard_by=None):
+        if shard_by not in (None, 'size', 'count', 'month'):
+            raise ValueError(f"Unknown shard mode: {shard_by}")
+        self.path = path
+        self.shard_by = shard_by
+        self.shards = {}          # key -> {'name', 'count', 'bytes', 'first', 'last'}, in creation order
+        self.open_files = OrderedDict()
+        self.sequence = 1
+        self.removed = 0
+        # Read before anything is written, since the index may be overwritten by this run
+        self.previous_shards = read_index_shards(path)
+
+    def __enter__(self):
+        return self
+
+    def write(self, conv, idx):
+        key = self.shard_key(conv)
+        shard = self.shards.get(key)
+        if shard is None:
+            name = os.path.basename(self.path)
+            if self.shard_by:
+                base, extension = os.path.splitext(name)
+                name = f"{base}_{key}{extension}"
+            shard = self.shards[key] = {'name': name, 'count': 0, 'bytes': 0, 'first': idx, 'last': idx}
+
+        out = self.open_shard(key)
+        if self.shard_by == 'size':
+            out = ShardOutput(out, shard)
+        if not shard['count']:
+            write_header(out, key if self.shard_by else None)
+        write_conversation(out, conv, idx)
+        shard['count'] += 1
+        shard['last'] = idx
+
+    def shard_key(self, conv):
+        if self.shard_by is None:
+            return None
+        if self.shard_by == 'month':
+            return format_month(conv.get('create_time'))
+
+        current = self.shards.get(f"{self.sequence:04d}")
+        if current and (
+            (self.shard_by == 'count' and current['count'] >= SHARD_MAX_CONVERSATIONS) or
+            (self.shard_by == 'size' and current['bytes'] >= SHARD_MAX_BYTES)
+        ):
+            self.close_shard(f"{self.sequence:04d}")
+            self.sequence += 1
+        return f"{self.sequence:04d}"
+
+    def open_shard(self, key):
+        if key in self.open_files:
+            self.open_files.move_to_end(key)
+            return self.open_files[key]
+
+        while len(self.open_files) >= MAX_OPEN_SHARDS:
+            self.close_shard(next(iter(self.open_files)))
+        # A shard closed to free a handle is reopened for appending
+        mode = 'a' if self.shards[key]['count'] else 'w'
+        out = open(self.shard_path(key), mode, encoding='utf-8', buffering=1 << 20)
+        self.open_files[key] = out
+        return out
+
+    def close_shard(self, key):
+        out = self.open_files.pop(key, None)
+        if out is not None:
+            out.close()
+
+    def shard_path(self, key):
+        return os.path.join(os.path.dirname(self.path), self.shards[key]['name'])
+
+    def finish(self, total_conversations):
+        """Writes each shard's footer and, when sharded, the index."""
+        if not self.shards:
+            self.shards[None] = {'name': os.path.basename(self.path), 'count': 0, 'bytes': 0, 'first': 0, 'last': 0}
+            write_header(self.open_shard(None))
+        for key, shard in self.shards.items():
+            write_footer(self.open_shard(key), shard['count'] if self.shard_by else total_conversations)
+            self.close_shard(key)
+
+        if self.shard_by:
+            with open(self.path, 'w', encoding='utf-8') as out:
+                shards = list(self.shards.values())
+                if self.shard_by == 'month':
+                    shards.sort(key=lambda shard: shard['name'])  # Oldest month first, undated last
+                write_index(out, shards, total_conversations, numbers=self.shard_by != 'month')
+        self.removed = self.remove_stale_shards()
+
+    def remove_stale_shards(self):
+        """
+        Deletes the shard files listed in the previous run's index that this
+        run did not write, e.g. after fewer conversations or another SHARD_BY.
+        Nothing else in the folder is touched. Returns how many were removed.
+        """
+        folder = os.path.dirname(self.path)
+        current = {shard['name'] for shard in self.shards.values()}
+        removed = 0
+        for name in self.previous_shards:
+            if name not in current and os.path.isfile(os.path.join(folder, name)):
+                try:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"Could not remove old shard {name}: {e}")
+        return removed
+
+    def __exit__(self, exc_type, exc, tb):
+        for key in list(self.open_files):
+            self.close_shard(key)
+        return False
 
-    print(f"Conversion complete! Readable file saved to: {OUTPUT_MD}")
 
+class ShardOutput:
+    """Passes writes through to a shard file, counting the bytes written for size rotation."""
 
-def write_header(out, total_conversations):
+    def __init__(self, out, shard):
+        self.out = out
+        self.shard = shard
+
+    def write(self, text):
+        self.out.write(text)
+        self.shard['bytes'] += len(text.encode('utf-8'))
+
+
+def write_index(out, shards, total_conversations, numbers=True):
+    # Month shards interleave conversation numbers, so a first-last range would mislead
+    out.write(INDEX_TITLE + "\n")
+    out.write(f"**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    out.write("---\n\n")
+    if numbers:
+        out.write("| File | Conversations | Numbers |\n")
+        out.write("|------|---------------|---------|\n")
+    else:
+        out.write("| File | Conversations |\n")
+        out.write("|------|---------------|\n")
+    for shard in shards:
+        link = f"[{shard['name']}]({quote(shard['name'])})"
+        if numbers:
+            out.write(f"| {link} | {shard['count']} | {shard['first']}-{shard['last']} |\n")
+        else:
+            out.write(f"| {link} | {shard['count']} |\n")
+    out.write("\n")
+    out.write(f"**Total conversations:** {total_conversations}\n")
+
+
+def read_index_shards(path):
+    """Returns the shard file names linked from an index written by write_index(), if path is one."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.readline() != INDEX_TITLE:
+                return []
+            names = [unquote(match.group(1)) for match in map(INDEX_LINK.match, f) if match]
+    except (OSError, UnicodeDecodeError):
+        return []
+    # Only plain file names next to the index, never paths elsewhere
+    return [name for name in names if name == os.path.basename(name) and name not in ('', '.', '..')]
+
+
+def format_month(timestamp):
+    try:
+        return datetime.fromtimestamp(float(timestamp)).strftime('%Y-%m')
+    except (TypeError, ValueError, OSError, OverflowError):
+        return 'unknown-date'
+
+
+def write_header(out, part=None):
     out.write("# ChatGPT Conversations - Readable Format\n\n")
-    out.write(f"**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    out.write(f"**Total conversations:** {total_conversations}\n\n")
+    out.write(f"**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    if part:
+        out.write(f"**Part:** {part}\n\n")
     out.write("---\n\n")
 
 
+def write_footer(out, total_conversations):
+    out.write(f"**Total conversations:** {total_conversations}\n")
+
+
 def write_conversation(out, conv, idx):
 
     # Extract convo metadata
@@ -54,8 +257,7 @@ def write_conversation(out, conv, idx):
     out.write(f"## {idx}. {title}\n")
     out.write(f"**Created:** {create_time}\n\n")
     
-    messages = conv.get('mapping', conv.get('messages', {}))
-    message_list = extract_messages(messages)
+    message_list = extract_messages(conv, ALL_BRANCHES)
     
     if message_list:
         for role, content in message_list:
@@ -66,6 +268,13 @@ def write_conversation(out, conv, idx):
     out.write("---\n\n")
 
 
+def iter_source_conversations():
+    # The archive decodes one row at a time, so both sources stream
+    if ARCHIVE_DB:
+        return iter_archived_conversations(ARCHIVE_DB)
+    return iter_conversations(MASTER_JSON)
+
+
 def format_timestamp(timestamp):
     try:
         if isinstance(timestamp, (int, float)):
@@ -78,39 +287,5 @@ def format_timestamp(timestamp):
         return str(timestamp) if timestamp else 'Unknown'
 
 
-def extract_messages(messages):
-    message_list = []
-    
-    if isinstance(messages, dict):
-        for message_data in messages.values():
-            if message_data is None:
-                continue
-                
-            message_obj = message_data.get('message')
-            if not isinstance(message_obj, dict):
-                continue
-                
-            content = message_obj.get('content', {})
-            parts = content.get('parts', [])
-            role = message_obj.get('author', {}).get('role', 'unknown')
-            
-            for part in parts:
-                if part and part.strip(): 
-                    message_list.append((role, part))
-                    
-    elif isinstance(messages, list):
-        for message in messages:
-            role = message.get('role', 'unknown')
-            content = message.get('content', '')
-   
-            if isinstance(content, dict):
-                content = content.get('parts', [''])[0]
-            
-            if content and content.strip(): 
-                message_list.append((role, content))
-    
-    return message_list
-
-
 if __name__ == "__main__":
     main()
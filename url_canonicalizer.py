@@ -0,0 +1,83 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+#---- Configs
+# Query parameters that only track where a click came from, on any site
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref_src', 'ref_url', '_ga', '_gl'
+}
+TRACKING_PREFIXES = ('utm_',)
+# Names that are tracking only on some sites and real parameters elsewhere
+# (GitHub's ?ref= picks a branch), keyed by host; subdomains match too
+HOST_TRACKING_PARAMS = {
+    'youtube.com': {'si', 'feature'},
+    'youtu.be': {'si', 'feature'},
+    'open.spotify.com': {'si'},
+    'aliexpress.com': {'spm'},
+    'taobao.com': {'spm'},
+    'tmall.com': {'spm'},
+}
+
+def canonical_url(url):
+    """
+    Returns a canonical form of a URL so near-duplicates compare equal:
+    http and https, 'www.' hosts, default ports, trailing slashes, fragments,
+    tracking parameters and query order all collapse. Non-web URLs
+    (javascript:, place:, file:) are only trimmed.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip('/') or '/'
+
+    host_params = host_tracking_params(host.split(':')[0])
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and key.lower() not in host_params
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def host_tracking_params(host):
+    """Returns the extra tracking parameters for a host or any of its parent domains."""
+    params = set()
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        params |= HOST_TRACKING_PARAMS.get('.'.join(labels[i:]), set())
+    return params
+
+
+def group_by_canonical_url(urls):
+    """Returns canonical url -> list of the original URLs, in first-seen order."""
+    groups = {}
+    for url in urls:
+        groups.setdefault(canonical_url(url), []).append(url)
+    return groups
+
+
+def deduplicate_bookmarks(bookmarks, url_key='url'):
+    """Keeps the first bookmark for each canonical URL and returns (unique bookmarks, duplicates removed)."""
+    seen = set()
+    unique = []
+    for bookmark in bookmarks:
+        key = canonical_url(bookmark[url_key])
+        if key not in seen:
+            seen.add(key)
+            unique.append(bookmark)
+    return unique, len(bookmarks) - len(unique)